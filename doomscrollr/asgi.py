@@ -0,0 +1,13 @@
+# doomscrollr/asgi.py
+
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'doomscrollr.settings')
+
+application = get_asgi_application()
+
+# Live chat streams share one sync thread instead of holding one each
+from projects.streams import shared_sync_thread  # noqa: E402 (needs the app registry)
+
+application = shared_sync_thread(application)
@@ -45,6 +45,7 @@ SITE_ID = 1
 # --- Middleware ---
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # must be first
+    "projects.query_budget.QueryBudgetMiddleware",  # counts every query below it
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -75,12 +76,17 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "doomscrollr.wsgi.application"
+ASGI_APPLICATION = "doomscrollr.asgi.application"
 
 # --- Database ---
+# The Procfile serves ASGI, where every request thread (and each sync_to_async
+# call) may open its own connection: persistent connections would pile up until
+# the database runs out of slots. Keep 0 under ASGI and pool with PgBouncer; a
+# WSGI deployment can raise DB_CONN_MAX_AGE (e.g. 600).
 DATABASES = {
     "default": dj_database_url.config(
         default=os.getenv("DATABASE_URL"),
-        conn_max_age=600,
+        conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", "0")),
         ssl_require=True,
     )
 }
@@ -120,7 +126,8 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        # DRF's JSONRenderer output, encoded with orjson when it is installed
+        "projects.renderers.FastJSONRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
@@ -129,6 +136,81 @@ REST_FRAMEWORK = {
     ],
 }
 
+# --- ASGI ---
+# Serve GET on the hottest list endpoints (users, projects, social posts, message
+# polling) from async views on the async ORM. Only helps under doomscrollr.asgi.
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "False") == "True"
+
+# --- Cache ---
+# Shared by the follow-graph cache and the anonymous response cache. LocMemCache
+# is per process; point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached when
+# running more than one worker so invalidations reach every process. With
+# LocMemCache and WEB_CONCURRENCY > 1 the response cache and ETag/Last-Modified
+# switch themselves off (response_cache.has_shared_versions).
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "doomscrollr"),
+    }
+}
+# Upper bound on how long an anonymous list/detail response is served from the cache.
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "60"))
+
+# --- Query budget ---
+# Queries a request may run before a warning is logged (views override with `query_budget`),
+# how many runs of one query shape count as a likely N+1, and whether to send Server-Timing.
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "25"))
+QUERY_BUDGET_DUPLICATE_THRESHOLD = int(os.getenv("QUERY_BUDGET_DUPLICATE_THRESHOLD", "5"))
+QUERY_BUDGET_SERVER_TIMING = os.getenv("QUERY_BUDGET_SERVER_TIMING", "True") == "True"
+
+# --- Feeds ---
+# Authors with more followers than this are not fanned out on write; their
+# posts are merged into followers' home feeds at read time instead.
+HOME_TIMELINE_FANOUT_LIMIT = int(os.getenv("HOME_TIMELINE_FANOUT_LIMIT", "5000"))
+# How many posts a rebuilt or backfilled home timeline keeps per user.
+HOME_TIMELINE_MAX_ENTRIES = int(os.getenv("HOME_TIMELINE_MAX_ENTRIES", "1000"))
+
+# --- Follow graph ---
+# Lifetime of cached following/follower id sets (explicitly invalidated on follow/unfollow).
+GRAPH_CACHE_TIMEOUT = int(os.getenv("GRAPH_CACHE_TIMEOUT", "600"))
+
+# --- Ledger ---
+# > 1 spreads each project's incoming donations over this many counter rows
+# (rolled into Project.current_funding by `manage.py rollup_funding`);
+# 0 or 1 updates Project.current_funding directly.
+PROJECT_FUNDING_SHARDS = int(os.getenv("PROJECT_FUNDING_SHARDS", "0"))
+# How long a stored Idempotency-Key response can be replayed.
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+# Upper bound on transfers accepted by one /api/transactions/batch/ call.
+TRANSACTION_BATCH_MAX_ITEMS = int(os.getenv("TRANSACTION_BATCH_MAX_ITEMS", "500"))
+
+# --- Messaging ---
+# Messages returned per page by /api/conversations/<id>/messages/ (?limit= is capped at the max).
+MESSAGE_PAGE_SIZE = int(os.getenv("MESSAGE_PAGE_SIZE", "50"))
+MESSAGE_PAGE_MAX = int(os.getenv("MESSAGE_PAGE_MAX", "200"))
+# Long-poll (?after_id=&wait=): longest hold, and how often the database is re-checked.
+MESSAGE_LONG_POLL_MAX_WAIT = float(os.getenv("MESSAGE_LONG_POLL_MAX_WAIT", "25"))
+MESSAGE_LONG_POLL_INTERVAL = float(os.getenv("MESSAGE_LONG_POLL_INTERVAL", "1"))
+# Hard cap on the wait for the sync view, where every waiting client holds a
+# worker thread; the async path (ASYNC_READ_VIEWS) uses MESSAGE_LONG_POLL_MAX_WAIT.
+MESSAGE_LONG_POLL_SYNC_MAX_WAIT = float(os.getenv("MESSAGE_LONG_POLL_SYNC_MAX_WAIT", "3"))
+# `manage.py archive_messages` moves messages older than this into ArchivedMessage.
+MESSAGE_ARCHIVE_AFTER_DAYS = int(os.getenv("MESSAGE_ARCHIVE_AFTER_DAYS", "180"))
+# Live delivery (/api/conversations/<id>/events/, served over ASGI). DatabasePollingBroker
+# works with any number of workers; InProcessBroker only reaches clients in the same
+# process, so it is only correct with a single worker (a warning is logged otherwise).
+CHAT_BROKER = os.getenv("CHAT_BROKER", "projects.realtime.DatabasePollingBroker")
+# DatabasePollingBroker costs one poller thread, one connection and one Message query
+# per interval per worker, however many streams are open. An idle stream holds no
+# thread or connection: scripts/loadtest_sse.py held 5,000 on one uvicorn worker in
+# ~330 MB. Delivery lags by up to the interval.
+# Worker processes per host; gunicorn reads the same variable for its default -w.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+CHAT_BROKER_POLL_INTERVAL = float(os.getenv("CHAT_BROKER_POLL_INTERVAL", "1"))
+CHAT_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("CHAT_SUBSCRIBER_QUEUE_SIZE", "100"))
+CHAT_SSE_HEARTBEAT_SECONDS = float(os.getenv("CHAT_SSE_HEARTBEAT_SECONDS", "15"))
+CHAT_SSE_RETRY_MS = int(os.getenv("CHAT_SSE_RETRY_MS", "3000"))
+
 # ✅ CRITICAL FIX: Properly configure dj-rest-auth to use JWT
 REST_AUTH = {
     "USE_JWT": True,
@@ -14,6 +14,12 @@ class TransactionAdmin(admin.ModelAdmin):
     list_display = ('id', 'sender', 'receiver', 'project', 'amount', 'timestamp')
     search_fields = ('sender__username', 'receiver__username', 'project__title')
     list_filter = ('timestamp',)
+    ordering = ('-timestamp', '-id')
+    # Join the displayed relations instead of one query per row, and skip the
+    # unfiltered COUNT(*) over the whole ledger on every page load
+    list_select_related = ('sender', 'receiver', 'project')
+    show_full_result_count = False
+    raw_id_fields = ('sender', 'receiver', 'project')
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
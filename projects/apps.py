@@ -8,3 +8,7 @@ class ProjectsConfig(AppConfig):
     def ready(self):
         # Import signal handlers
         import projects.signals
+        from projects.realtime import check_broker
+        from projects.response_cache import check_response_cache
+        check_broker()
+        check_response_cache()
@@ -0,0 +1,50 @@
+# projects/archive.py
+"""
+Cold storage for old chat history.
+
+`manage.py archive_messages` moves messages older than
+MESSAGE_ARCHIVE_AFTER_DAYS from Message into ArchivedMessage in small
+batches, keeping their ids. The hot table then holds only recent messages,
+so its indexes, vacuum and backups stay small.
+
+Messages are archived oldest-id first, so within a conversation every
+archived id is lower than every hot id. Readers can therefore page through
+the hot rows and continue in the archive where they run out.
+Each conversation's last_message is never archived, so inbox previews
+keep pointing at a live row.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedMessage, Conversation, Message
+
+BULK_BATCH_SIZE = 1000
+
+
+def archived_messages(conversation_id):
+    return ArchivedMessage.objects.filter(conversation_id=conversation_id).select_related('sender__userprofile')
+
+
+def archive_messages(older_than_days, batch_size=BULK_BATCH_SIZE):
+    """Move messages older than `older_than_days` into the archive. Returns the number moved."""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    candidates = (
+        Message.objects.filter(timestamp__lt=cutoff)
+        .exclude(id__in=Conversation.objects.filter(last_message__isnull=False).values('last_message_id'))
+        .order_by('id')
+    )
+
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(candidates.values('id', 'conversation_id', 'sender_id', 'text', 'timestamp')[:batch_size])
+            if not rows:
+                break
+            ArchivedMessage.objects.bulk_create([ArchivedMessage(**row) for row in rows], ignore_conflicts=True)
+            Message.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+    return moved
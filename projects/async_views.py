@@ -0,0 +1,74 @@
+# projects/async_views.py
+"""
+Async GET path for the read-heavy list endpoints.
+
+When settings.ASYNC_READ_VIEWS is on (only worthwhile under the ASGI entry
+point, doomscrollr/asgi.py), urls.py routes these views through
+`async_get()`. GET requests run on the event loop and read through Django's
+async ORM, so a slow query or a long-poll no longer pins a worker thread.
+Every other method falls through to the normal sync DRF view. Both paths
+share the view class: authentication, permissions, querysets, serializers
+and the response shape are the same.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncListMixin:
+    """Give a ListAPIView an `alist()` that mirrors `list()` using the async ORM."""
+
+    async def aget(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.paginator
+        if paginator is None:
+            rows = [obj async for obj in queryset]
+        else:
+            rows = await paginator.apaginate_queryset(queryset, request, view=self)
+        # Serializers may still touch the DB/cache (e.g. the follow set), so build them off the loop
+        data = await sync_to_async(lambda: self.get_serializer(rows, many=True).data)()
+        if paginator is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+
+def async_get(view_class, **initkwargs):
+    """
+    Build a URL view that serves GET through `view_class.aget()` on the
+    event loop and hands every other method to the regular sync view.
+    """
+    sync_view = sync_to_async(view_class.as_view(**initkwargs))
+
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET':
+            return await sync_view(request, *args, **kwargs)
+
+        self = view_class(**initkwargs)
+        self.setup(request, *args, **kwargs)
+        self.format_kwarg = None
+        drf_request = self.initialize_request(request, *args, **kwargs)
+        self.request = drf_request
+        self.headers = self.default_response_headers
+        try:
+            # Authentication (JWT user lookup) and permission checks are sync
+            await sync_to_async(self.initial)(drf_request, *args, **kwargs)
+            response = await self.aget(drf_request, *args, **kwargs)
+        except Exception as exc:
+            try:
+                response = self.handle_exception(exc)
+            except Exception as e:
+                logger.error(f"❌ {view_class.__name__} async GET error: {str(e)}")
+                response = Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return self.finalize_response(drf_request, response, *args, **kwargs)
+
+    # DRF views are CSRF-exempt (they authenticate by token); keep that for POST fall-through
+    view.csrf_exempt = True
+    view.view_class = view_class
+    return view
@@ -0,0 +1,147 @@
+# projects/balances.py
+"""
+Balance snapshots and incremental ledger audits.
+
+Balances also move outside the Transaction table (signup grants, admin
+top-ups), so they can't be recomputed from history alone. Instead each user
+has a BalanceSnapshot: the balance as of Transaction `last_transaction_id`.
+The ledger invariant is then
+
+    balance == snapshot.balance + received(id > last_id) - sent(id > last_id)
+
+which only reads the transactions since the snapshot. Every check is one
+SELECT with per-user correlated sums, so balances and flows come from the
+same statement snapshot even while transfers keep committing (a transfer
+updates both in one database transaction, see projects/ledger.py).
+
+Snapshots are cut at a watermark: the newest transaction older than
+`settle_seconds`. Rows still committing out of id order are therefore not
+skipped (the same rule as ranking.refresh_project_scores).
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import BalanceSnapshot, Transaction, UserProfile
+
+BULK_BATCH_SIZE = 1000
+ZERO = Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def ledger_watermark(settle_seconds=30):
+    """Id of the newest transaction older than `settle_seconds` (0 if none)."""
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    last = (
+        Transaction.objects.filter(timestamp__lte=cutoff)
+        .order_by('-timestamp', '-id').values_list('id', flat=True).first()
+    )
+    return last or 0
+
+
+def _flow_after(side, after_id):
+    """Correlated SUM(amount) of the outer user's `side` transactions with id > after_id."""
+    return Coalesce(Subquery(
+        Transaction.objects.filter(**{side: OuterRef('user_id'), 'id__gt': after_id})
+        .order_by().values(side).annotate(total=Sum('amount')).values('total')
+    ), ZERO)
+
+
+def _net_flow_after(after_id):
+    return _flow_after('receiver', after_id) - _flow_after('sender', after_id)
+
+
+def _upsert_snapshots(batch):
+    BalanceSnapshot.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['balance', 'last_transaction_id', 'taken_at'],
+    )
+    return len(batch)
+
+
+# -------------------------------
+# REBUILD
+# -------------------------------
+
+def rebuild_balance_snapshots(settle_seconds=30):
+    """
+    Re-cut every user's snapshot at the current watermark, accepting today's
+    balances as correct. Returns the number of snapshots written.
+    """
+    watermark = ledger_watermark(settle_seconds)
+    rows = UserProfile.objects.annotate(
+        snapshot_balance=F('balance') - _net_flow_after(watermark),
+    ).values_list('user_id', 'snapshot_balance')
+
+    written = 0
+    batch = []
+    with transaction.atomic():
+        for user_id, balance in rows.iterator(chunk_size=BULK_BATCH_SIZE):
+            batch.append(BalanceSnapshot(user_id=user_id, balance=balance, last_transaction_id=watermark))
+            if len(batch) >= BULK_BATCH_SIZE:
+                written += _upsert_snapshots(batch)
+                batch = []
+        if batch:
+            written += _upsert_snapshots(batch)
+    return written
+
+
+# -------------------------------
+# AUDIT
+# -------------------------------
+
+def audit_balances(settle_seconds=30, advance=True):
+    """
+    Check every UserProfile.balance against its snapshot plus the
+    transactions after it.
+
+    Users that pass (and users with no snapshot yet) get a fresh snapshot at
+    the current watermark when `advance` is set, so the next run only reads
+    newer transactions. Failing users keep their old snapshot so they keep
+    failing until someone looks.
+
+    Returns (checked, seeded, mismatches) where mismatches is a list of
+    (user_id, expected, actual).
+    """
+    watermark = ledger_watermark(settle_seconds)
+    rows = UserProfile.objects.annotate(
+        snapshot_balance=F('user__balance_snapshot__balance'),
+        snapshot_last_id=Coalesce(F('user__balance_snapshot__last_transaction_id'), 0),
+        net_since_snapshot=_net_flow_after(OuterRef('snapshot_last_id')),
+        net_since_watermark=_net_flow_after(watermark),
+    ).values_list('user_id', 'balance', 'snapshot_balance', 'snapshot_last_id',
+                  'net_since_snapshot', 'net_since_watermark')
+
+    checked = seeded = 0
+    mismatches = []
+    batch = []
+    with transaction.atomic():
+        for user_id, balance, snapshot_balance, snapshot_last_id, net_since_snapshot, net_since_watermark in (
+            rows.iterator(chunk_size=BULK_BATCH_SIZE)
+        ):
+            checked += 1
+            if snapshot_balance is None:
+                seeded += 1
+            else:
+                expected = snapshot_balance + net_since_snapshot
+                if expected != balance:
+                    mismatches.append((user_id, expected, balance))
+                    continue
+            # Never move a snapshot backwards (e.g. a run with a longer settle window)
+            if advance and (snapshot_balance is None or snapshot_last_id < watermark):
+                batch.append(BalanceSnapshot(
+                    user_id=user_id,
+                    balance=balance - net_since_watermark,
+                    last_transaction_id=watermark,
+                ))
+                if len(batch) >= BULK_BATCH_SIZE:
+                    _upsert_snapshots(batch)
+                    batch = []
+        if batch:
+            _upsert_snapshots(batch)
+    return checked, seeded, mismatches
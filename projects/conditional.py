@@ -0,0 +1,100 @@
+# projects/conditional.py
+"""
+Conditional GET (ETag / Last-Modified) for the public read endpoints.
+
+The validators are computed without building the response. They come from
+the response cache's version token for each model group the view reads
+(bumped on every write, see response_cache.py) and the newest row's
+timestamp among the rows the view serves, read with one index probe. A
+request whose If-None-Match or If-Modified-Since still matches gets a 304
+before the queryset runs or the serializer is built.
+
+Last-Modified has one-second resolution, so it is rounded up, and it is
+left out while that second is still running: a later write in the same
+second would otherwise carry the same date and get a stale 304.
+
+Authenticated responses carry per-viewer fields, so the viewer's id is part
+of the ETag and responses vary on Authorization.
+"""
+import hashlib
+import math
+import time
+
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .response_cache import get_versions, has_shared_versions
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag/Last-Modified to a DRF GET view and answer 304 when they match.
+    `cache_groups` lists the model groups the response is built from and
+    `last_modified_field` the model's creation timestamp.
+    """
+    cache_groups = ()
+    last_modified_field = 'created_at'
+
+    def get_latest_created(self):
+        """Creation time of the newest row in this response: the object itself on a detail view."""
+        queryset = self.get_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        else:
+            queryset = self.filter_queryset(queryset)
+        # Ids grow with creation time, so the newest row is the one with the highest pk
+        queryset = queryset.select_related(None).prefetch_related(None).order_by('-pk')
+        return queryset.values_list(self.last_modified_field, flat=True).first()
+
+    def get_validators(self, request):
+        """(etag, last_modified) for the current request; last_modified is a Unix timestamp."""
+        versions = get_versions(self.cache_groups)
+        latest = self.get_latest_created()
+
+        stamps = [int(version) / 1e9 for version in versions]
+        if latest is not None:
+            stamps.append(latest.timestamp())
+        last_modified = math.ceil(max(stamps)) if stamps else None
+        if last_modified is not None and last_modified > time.time():
+            last_modified = None
+
+        params = sorted((key, values) for key, values in request.query_params.lists())
+        renderer = getattr(request, 'accepted_media_type', '')
+        fingerprint = repr((
+            type(self).__name__, request.path, self.kwargs, params, renderer,
+            request.user.pk, versions, latest.isoformat() if latest else None,
+        ))
+        return quote_etag(hashlib.md5(fingerprint.encode()).hexdigest()), last_modified
+
+    def not_modified(self, request, etag, last_modified):
+        """A 304 response if the client's copy is current, otherwise None."""
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def set_validators(self, response, etag, last_modified):
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def get(self, request, *args, **kwargs):
+        if not has_shared_versions():
+            # A worker that never saw the write would keep answering 304
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request)
+        response = self.not_modified(request, etag, last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    async def aget(self, request, *args, **kwargs):
+        if not has_shared_versions():
+            return await super().aget(request, *args, **kwargs)
+        etag, last_modified = await sync_to_async(self.get_validators)(request)
+        response = self.not_modified(request, etag, last_modified)
+        if response is None:
+            response = await super().aget(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
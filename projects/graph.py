@@ -0,0 +1,95 @@
+# projects/graph.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import UserProfile
+from .response_cache import bump_versions
+
+# The follow edge table behind UserProfile.followers: (userprofile_id -> user_id)
+Follow = UserProfile.followers.through
+
+
+# -------------------------------
+# CACHED ADJACENCY SETS
+# -------------------------------
+# Each user's following/follower id sets are cached for GRAPH_CACHE_TIMEOUT
+# seconds. follow()/unfollow() delete the two affected keys explicitly, so
+# the cache never serves an edge that has been removed.
+
+def _following_key(user_id):
+    return f'graph:following:{user_id}'
+
+
+def _followers_key(user_id):
+    return f'graph:followers:{user_id}'
+
+
+def get_following_ids(user_id):
+    """
+    Return the set of user ids that `user_id` follows.
+    UserProfile.followers stores (profile -> follower) edges, so we read the
+    profiles this user appears in and map them back to their owners.
+    """
+    key = _following_key(user_id)
+    following_ids = cache.get(key)
+    if following_ids is None:
+        following_ids = set(
+            UserProfile.objects.filter(followers__id=user_id).values_list('user_id', flat=True)
+        )
+        cache.set(key, following_ids, settings.GRAPH_CACHE_TIMEOUT)
+    return following_ids
+
+
+def get_follower_ids(user_id):
+    """Return the set of user ids following `user_id`."""
+    key = _followers_key(user_id)
+    follower_ids = cache.get(key)
+    if follower_ids is None:
+        follower_ids = set(
+            Follow.objects.filter(userprofile__user_id=user_id).values_list('user_id', flat=True)
+        )
+        cache.set(key, follower_ids, settings.GRAPH_CACHE_TIMEOUT)
+    return follower_ids
+
+
+def invalidate_follow_edge(follower_id, followee_id):
+    cache.delete_many([_following_key(follower_id), _followers_key(followee_id)])
+
+
+# -------------------------------
+# FOLLOW / UNFOLLOW
+# -------------------------------
+
+def _adjust_counts(follower_id, followee_id, delta):
+    # Touch the two profile rows in a fixed (user id) order so concurrent
+    # A->B and B->A follows cannot deadlock on each other's row locks.
+    updates = {}
+    updates.setdefault(follower_id, {})['following_count'] = Greatest(F('following_count') + delta, 0)
+    updates.setdefault(followee_id, {})['follower_count'] = Greatest(F('follower_count') + delta, 0)
+    for user_id in sorted(updates):
+        UserProfile.objects.filter(user_id=user_id).update(**updates[user_id])
+    # follower/following counts are part of every public user payload
+    bump_versions('user')
+
+
+def follow(follower, target_profile):
+    """Add the edge follower -> target. Returns False if it already existed."""
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(userprofile_id=target_profile.pk, user_id=follower.pk)
+        if created:
+            _adjust_counts(follower.pk, target_profile.user_id, 1)
+        transaction.on_commit(lambda: invalidate_follow_edge(follower.pk, target_profile.user_id))
+    return created
+
+
+def unfollow(follower, target_profile):
+    """Remove the edge follower -> target. Returns False if there was none."""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(userprofile_id=target_profile.pk, user_id=follower.pk).delete()
+        if deleted:
+            _adjust_counts(follower.pk, target_profile.user_id, -1)
+        transaction.on_commit(lambda: invalidate_follow_edge(follower.pk, target_profile.user_id))
+    return bool(deleted)
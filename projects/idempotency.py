@@ -0,0 +1,85 @@
+# projects/idempotency.py
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def _request_hash(request):
+    payload = json.dumps(request.data, cls=DjangoJSONEncoder, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{payload}'.encode()).hexdigest()
+
+
+def purge_expired_keys():
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+class IdempotentCreateMixin:
+    """
+    Make a create view's POST safe to retry.
+
+    If the client sends an `Idempotency-Key` header, the key is claimed
+    inside the same database transaction as the write, and the successful
+    response is stored with it. A retry with the same key replays the stored
+    response (marked `Idempotent-Replayed: true`) instead of writing again;
+    a concurrent duplicate blocks on the key's unique index until the first
+    request commits. Error responses are rolled back with the write, so the
+    client may fix the request and retry with the same key.
+    """
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return super().post(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({"error": f"{IDEMPOTENCY_HEADER} is too long."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        request_hash = _request_hash(request)
+        IdempotencyKey.objects.filter(user=request.user, key=key, expires_at__lte=timezone.now()).delete()
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user,
+                        key=key,
+                        request_hash=request_hash,
+                        expires_at=timezone.now() + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+                    )
+            except IntegrityError:
+                return self._replay(request, key, request_hash)
+
+            response = super().post(request, *args, **kwargs)
+            if not status.is_success(response.status_code):
+                transaction.set_rollback(True)
+                return response
+
+            record.response_status = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=['response_status', 'response_body'])
+            return response
+
+    def _replay(self, request, key, request_hash):
+        record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+        if record is None or record.response_status is None:
+            return Response({"error": "A request with this Idempotency-Key is still in progress."},
+                            status=status.HTTP_409_CONFLICT)
+        if record.request_hash != request_hash:
+            return Response({"error": f"{IDEMPOTENCY_HEADER} was already used for a different request."},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(record.response_body, status=record.response_status,
+                        headers={REPLAY_HEADER: 'true'})
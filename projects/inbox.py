@@ -0,0 +1,86 @@
+# projects/inbox.py
+"""
+Inbox bookkeeping for conversations.
+
+Every Conversation has one ConversationParticipant row per member holding
+that member's read marker, unread count and a copy of the conversation's
+latest activity time. A new message costs two single-statement UPDATEs
+(the conversation and its participant rows), and the inbox is read with
+one range scan on participant_inbox_idx, however long the threads get.
+"""
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Conversation, ConversationParticipant, Message
+
+
+def get_or_create_conversation(user_id, other_user_id):
+    """
+    Return (conversation, created) for the pair, in either order. The pair is
+    stored canonically (lower user id first), so this is one seek on the
+    (user1, user2) unique index; two racing creators end up with the same row
+    because get_or_create falls back to a lookup on IntegrityError.
+    """
+    user1_id, user2_id = sorted((user_id, other_user_id))
+    return Conversation.objects.get_or_create(user1_id=user1_id, user2_id=user2_id)
+
+
+def is_participant(user_id, conversation_id):
+    """One seek on the (conversation, user) unique index."""
+    return ConversationParticipant.objects.filter(conversation_id=conversation_id, user_id=user_id).exists()
+
+
+def add_participants(conversation):
+    ConversationParticipant.objects.bulk_create(
+        [
+            ConversationParticipant(conversation=conversation, user_id=user_id,
+                                    last_message_at=conversation.created_at)
+            for user_id in {conversation.user1_id, conversation.user2_id}
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def record_message(message):
+    """Move the conversation's last message forward and bump everyone else's unread count."""
+    Conversation.objects.filter(
+        Q(last_message__isnull=True) | Q(last_message_id__lt=message.pk),
+        pk=message.conversation_id,
+    ).update(last_message_id=message.pk, last_message_at=message.timestamp)
+
+    # Sending a message implies the sender has read the thread up to it
+    is_sender = Q(user_id=message.sender_id)
+    ConversationParticipant.objects.filter(conversation_id=message.conversation_id).update(
+        last_message_at=Greatest(F('last_message_at'), Value(message.timestamp)),
+        unread_count=Case(When(is_sender, then=Value(0)), default=F('unread_count') + 1),
+        last_read_message_id=Case(
+            When(is_sender, then=Greatest(F('last_read_message_id'), Value(message.pk))),
+            default=F('last_read_message_id'),
+        ),
+    )
+
+
+def mark_read(participant, message_id=None):
+    """
+    Advance `participant`'s read marker to `message_id` (default: the newest
+    message) and recount what is still unread after it. Markers never move
+    backwards. Returns the updated participant.
+    """
+    if message_id is None:
+        message_id = Conversation.objects.filter(pk=participant.conversation_id).values_list(
+            'last_message_id', flat=True
+        ).first() or 0
+    marker = max(participant.last_read_message_id, message_id)
+
+    # Counted from the (conversation_id, id) index: only messages after the marker
+    unread = Message.objects.filter(
+        conversation_id=participant.conversation_id, id__gt=marker
+    ).exclude(sender_id=participant.user_id).aggregate(n=Count('id'))['n']
+
+    ConversationParticipant.objects.filter(pk=participant.pk).update(
+        last_read_message_id=Greatest(F('last_read_message_id'), Value(marker)),
+        unread_count=unread,
+    )
+    participant.last_read_message_id = marker
+    participant.unread_count = unread
+    return participant
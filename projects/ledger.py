@@ -0,0 +1,186 @@
+# projects/ledger.py
+"""
+Money movement between UserProfile balances and Project funding.
+
+All writes are single-column `UPDATE ... SET col = col + x` statements, so
+concurrent donations never overwrite each other's read-modify-write, and a
+debit is guarded in the same statement (`WHERE balance >= amount`) so a
+balance can never go negative. Rows are always touched in the same order
+(profiles by user id, then the project) so two opposite transfers cannot
+deadlock on each other's locks.
+
+With PROJECT_FUNDING_SHARDS > 1, donations to a project are spread over that
+many ProjectFundingShard rows so a trending project doesn't serialize every
+donor on its single row lock; `rollup_project_funding()` moves the shard
+totals into Project.current_funding.
+"""
+import random
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Project, ProjectFundingShard, Transaction, UserProfile
+from .response_cache import bump_versions
+
+AMOUNT_QUANTUM = Decimal('0.01')
+# Transaction.amount is DecimalField(max_digits=10, decimal_places=2)
+MAX_AMOUNT = Decimal('99999999.99')
+
+
+class LedgerError(Exception):
+    """A transfer that cannot be applied; the message is safe to show clients."""
+
+
+class InvalidAmount(LedgerError):
+    pass
+
+
+class InsufficientFunds(LedgerError):
+    pass
+
+
+def parse_amount(raw):
+    """Parse a client-supplied amount into a positive 2-place Decimal."""
+    try:
+        amount = Decimal(str(raw))
+    except (InvalidOperation, ValueError):
+        raise InvalidAmount("amount must be a number.")
+    if not amount.is_finite() or amount <= 0:
+        raise InvalidAmount("amount must be greater than zero.")
+    if amount != amount.quantize(AMOUNT_QUANTUM):
+        raise InvalidAmount("amount cannot have more than 2 decimal places.")
+    if amount > MAX_AMOUNT:
+        raise InvalidAmount("amount is too large.")
+    return amount
+
+
+def apply_balance_deltas(deltas):
+    """
+    Apply [(user_id, delta), ...] to UserProfile.balance in user-id order.
+    Debits are conditional on sufficient balance. Must run inside an atomic
+    block: a failed debit raises and rolls back the credits already applied.
+    """
+    # For the same user, debits (negative) sort before credits
+    for user_id, delta in sorted(deltas):
+        profiles = UserProfile.objects.filter(user_id=user_id)
+        if delta < 0:
+            updated = profiles.filter(balance__gte=-delta).update(balance=F('balance') + delta)
+            if not updated:
+                raise InsufficientFunds("Insufficient balance.")
+        elif delta > 0:
+            if not profiles.update(balance=F('balance') + delta):
+                raise LedgerError("Receiver has no profile.")
+
+
+def credit_project(project_id, amount):
+    if settings.PROJECT_FUNDING_SHARDS > 1:
+        _credit_funding_shard(project_id, random.randrange(settings.PROJECT_FUNDING_SHARDS), amount)
+    else:
+        Project.objects.filter(pk=project_id).update(current_funding=F('current_funding') + amount)
+        bump_versions('project')
+
+
+def _credit_funding_shard(project_id, shard, amount):
+    shards = ProjectFundingShard.objects.filter(project_id=project_id, shard=shard)
+    if shards.update(amount=F('amount') + amount):
+        return
+    try:
+        # First donation to land on this shard; a concurrent one may win the insert
+        with transaction.atomic():
+            ProjectFundingShard.objects.create(project_id=project_id, shard=shard, amount=amount)
+    except IntegrityError:
+        shards.update(amount=F('amount') + amount)
+
+
+def rollup_project_funding(project_ids=None):
+    """
+    Drain funding shards into Project.current_funding, one project per
+    transaction: the shard rows are locked, summed, zeroed and the total is
+    added to the project, so the reported funding is exact after each rollup.
+    Returns the number of projects updated.
+    """
+    pending = ProjectFundingShard.objects.exclude(amount=0)
+    if project_ids is not None:
+        pending = pending.filter(project_id__in=project_ids)
+
+    updated = 0
+    for project_id in pending.order_by('project_id').values_list('project_id', flat=True).distinct():
+        with transaction.atomic():
+            shards = list(
+                ProjectFundingShard.objects.select_for_update().filter(project_id=project_id).order_by('shard')
+            )
+            total = sum((shard.amount for shard in shards), Decimal('0'))
+            if not total:
+                continue
+            # Zero only the rows we locked and summed; a shard created meanwhile waits for the next run
+            ProjectFundingShard.objects.filter(pk__in=[shard.pk for shard in shards]).update(amount=0)
+            Project.objects.filter(pk=project_id).update(current_funding=F('current_funding') + total)
+            updated += 1
+    if updated:
+        bump_versions('project')
+    return updated
+
+
+def transfer(sender, receiver, project, amount):
+    """Move `amount` from sender to receiver as a donation to `project`."""
+    with transaction.atomic():
+        apply_balance_deltas([(sender.pk, -amount), (receiver.pk, amount)])
+        credit_project(project.pk, amount)
+        return Transaction.objects.create(
+            sender=sender,
+            receiver=receiver,
+            project=project,
+            amount=amount,
+        )
+
+
+def transfer_batch(sender, items):
+    """
+    Apply many donations from one sender in a single transaction.
+
+    `items` is a list of (receiver, project, amount) tuples, already
+    validated. Every involved profile row is locked once, in user-id order,
+    and the sender's balance is walked in memory so each item succeeds or
+    fails on its own (insufficient balance) without aborting the batch.
+    Balances and project funding are then applied as one aggregated update
+    per row, and the Transaction rows are bulk-inserted.
+
+    Returns a list aligned with `items`: a saved Transaction, or the
+    LedgerError explaining why that item was skipped.
+    """
+    results = [None] * len(items)
+    with transaction.atomic():
+        user_ids = {sender.pk} | {receiver.pk for receiver, _, _ in items}
+        profiles = UserProfile.objects.select_for_update().filter(user_id__in=user_ids).order_by('user_id')
+        balances = dict(profiles.values_list('user_id', 'balance'))
+
+        available = balances.get(sender.pk, Decimal('0'))
+        deltas = {}
+        project_totals = {}
+        accepted = []
+        for index, (receiver, project, amount) in enumerate(items):
+            if receiver.pk not in balances:
+                results[index] = LedgerError("Receiver has no profile.")
+                continue
+            if amount > available:
+                results[index] = InsufficientFunds("Insufficient balance.")
+                continue
+            available -= amount
+            deltas[sender.pk] = deltas.get(sender.pk, Decimal('0')) - amount
+            deltas[receiver.pk] = deltas.get(receiver.pk, Decimal('0')) + amount
+            project_totals[project.pk] = project_totals.get(project.pk, Decimal('0')) + amount
+            accepted.append(index)
+
+        apply_balance_deltas(list(deltas.items()))
+        for project_id in sorted(project_totals):
+            credit_project(project_id, project_totals[project_id])
+
+        created = Transaction.objects.bulk_create([
+            Transaction(sender=sender, receiver=items[index][0], project=items[index][1], amount=items[index][2])
+            for index in accepted
+        ])
+        for index, trans in zip(accepted, created):
+            results[index] = trans
+    return results
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from projects.archive import archive_messages
+
+class Command(BaseCommand):
+    help = 'Move old chat messages from Message into the ArchivedMessage cold-storage table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.MESSAGE_ARCHIVE_AFTER_DAYS,
+                            help='Archive messages older than this many days.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Messages moved per transaction.')
+
+    def handle(self, *args, **options):
+        moved = archive_messages(options['days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Archived {moved} messages'))
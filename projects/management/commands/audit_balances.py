@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from projects.balances import audit_balances
+
+class Command(BaseCommand):
+    help = 'Check every UserProfile.balance against its snapshot plus the transactions since'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-advance', action='store_true',
+                            help='Report only; do not move passing snapshots forward.')
+        parser.add_argument('--settle-seconds', type=int, default=30,
+                            help='Leave transactions younger than this for the next run.')
+        parser.add_argument('--show', type=int, default=50,
+                            help='How many mismatched users to print.')
+
+    def handle(self, *args, **options):
+        checked, seeded, mismatches = audit_balances(
+            settle_seconds=options['settle_seconds'], advance=not options['no_advance'],
+        )
+        for user_id, expected, actual in mismatches[:options['show']]:
+            self.stdout.write(self.style.ERROR(f'❌ User {user_id}: expected {expected}, found {actual}'))
+
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} of {checked} balances do not match the ledger')
+        self.stdout.write(self.style.SUCCESS(f'✅ Audited {checked} balances ({seeded} new snapshots)'))
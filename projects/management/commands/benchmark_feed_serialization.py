@@ -0,0 +1,111 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from projects.models import Comment, Like, SocialPost, UserProfile
+from projects.renderers import FastJSONRenderer
+from projects.views import SocialPostListCreateView
+
+
+class Command(BaseCommand):
+    help = 'Time one feed page through the DRF serializers and through PostRowSerializer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000, help='Posts on the page.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per path; the fastest is reported.')
+        parser.add_argument('--summary', action='store_true', help='Benchmark ?mode=summary.')
+        parser.add_argument('--viewer', help='Username to serialize for (default: anonymous).')
+        parser.add_argument('--seed', action='store_true',
+                            help='Add posts with 3 likes and 2 comments each until there are --posts, '
+                                 'and roll them back afterwards.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed']:
+                self.seed(options['posts'])
+            self.benchmark(options)
+            transaction.set_rollback(True)  # nothing here is meant to stay
+
+    def benchmark(self, options):
+        post_ids = list(SocialPost.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:options['posts']])
+        if not post_ids:
+            raise CommandError('No posts to serialize; run with --seed')
+
+        request = APIRequestFactory().get('/api/social-posts/', {'mode': 'summary'} if options['summary'] else {})
+        if options['viewer']:
+            viewer = User.objects.filter(username=options['viewer']).first()
+            if viewer is None:
+                raise CommandError(f'No user named {options["viewer"]}')
+            force_authenticate(request, user=viewer)
+        view = SocialPostListCreateView()
+        view.request = view.initialize_request(request)
+        view.args, view.kwargs, view.format_kwarg = (), {}, None
+        # decorate_feed_queryset adds the DRF path's joins and prefetches only when the fast path is off
+        view.fast_serialization = False
+
+        def drf():
+            queryset = SocialPost.objects.filter(id__in=post_ids).order_by('-created_at', '-id')
+            return view.get_serializer(view.decorate_feed_queryset(queryset), many=True).data
+
+        slow_ms, slow_queries, slow_data = self.measure(drf, options['repeat'])
+        fast_ms, fast_queries, fast_data = self.measure(lambda: view.serialize_posts(post_ids), options['repeat'])
+        slow_render_ms, slow_body = self.measure_render(JSONRenderer(), slow_data, options['repeat'])
+        fast_render_ms, fast_body = self.measure_render(FastJSONRenderer(), fast_data, options['repeat'])
+
+        per_1000 = 1000 / len(post_ids)
+        self.stdout.write(f'{len(post_ids)} posts, {"summary" if options["summary"] else "full"} mode, '
+                          f'{"viewer " + options["viewer"] if options["viewer"] else "anonymous"}')
+        self.stdout.write(f'  SocialPostSerializer: {slow_ms:8.1f} ms ({slow_ms * per_1000:.1f} ms / 1,000 posts, '
+                          f'{slow_queries} queries) + JSONRenderer {slow_render_ms:.1f} ms')
+        self.stdout.write(f'  PostRowSerializer:    {fast_ms:8.1f} ms ({fast_ms * per_1000:.1f} ms / 1,000 posts, '
+                          f'{fast_queries} queries) + FastJSONRenderer {fast_render_ms:.1f} ms')
+
+        if slow_body != fast_body:
+            raise CommandError('The two paths rendered different JSON')
+        speedup = (slow_ms + slow_render_ms) / (fast_ms + fast_render_ms)
+        self.stdout.write(self.style.SUCCESS(f'✅ Identical output; serialize + render is {speedup:.1f}x faster'))
+
+    def measure(self, serialize, repeat):
+        """(fastest ms, queries of one run, output) for `serialize()`."""
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                data = serialize()
+                timings.append((time.perf_counter() - start) * 1000)
+        return min(timings), len(queries), data
+
+    def measure_render(self, renderer, data, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = renderer.render(data)
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings), body
+
+    def seed(self, count):
+        missing = count - SocialPost.objects.count()
+        if missing <= 0:
+            return
+        users = User.objects.bulk_create(
+            [User(username=f'benchmark_{time.time_ns()}_{i}') for i in range(20)]
+        )
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users], ignore_conflicts=True)
+        posts = SocialPost.objects.bulk_create([
+            SocialPost(author=users[i % len(users)], content=f'Benchmark post {i}', like_count=3, comment_count=2)
+            for i in range(missing)
+        ])
+        Like.objects.bulk_create([
+            Like(post=post, user=users[(i + offset) % len(users)])
+            for i, post in enumerate(posts) for offset in (1, 2, 3)
+        ])
+        Comment.objects.bulk_create([
+            Comment(post=post, user=users[(i + offset) % len(users)], content=f'Comment {offset}')
+            for i, post in enumerate(posts) for offset in (4, 5)
+        ])
+        self.stdout.write(f'Seeded {missing} posts (rolled back at the end)')
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from projects.idempotency import purge_expired_keys
+
+class Command(BaseCommand):
+    help = 'Delete expired Idempotency-Key records'
+
+    def handle(self, *args, **kwargs):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'✅ Purged {deleted} expired idempotency keys'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from projects.balances import rebuild_balance_snapshots
+
+class Command(BaseCommand):
+    help = 'Re-cut every balance snapshot from current balances (run after resolving audit failures)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settle-seconds', type=int, default=30,
+                            help='Leave transactions younger than this for the next run.')
+
+    def handle(self, *args, **options):
+        written = rebuild_balance_snapshots(settle_seconds=options['settle_seconds'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt {written} balance snapshots'))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from projects.search import rebuild_index
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents for users, posts and projects'
+
+    def handle(self, *args, **kwargs):
+        written = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'✅ Indexed {written} documents'))
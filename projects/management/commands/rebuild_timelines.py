@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import transaction
+from projects.timeline import rebuild_timeline
+
+class Command(BaseCommand):
+    help = 'Backfill or rebuild materialized home timelines (TimelineEntry)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only rebuild this user id (repeatable). Defaults to everyone.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Users rebuilt per database transaction.')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids'] or User.objects.order_by('id').values_list('id', flat=True)
+        user_ids = list(user_ids)
+        batch_size = max(1, options['batch_size'])
+
+        users_done = entries_written = 0
+        for start in range(0, len(user_ids), batch_size):
+            with transaction.atomic():
+                for user_id in user_ids[start:start + batch_size]:
+                    entries_written += rebuild_timeline(user_id)
+                    users_done += 1
+            self.stdout.write(f'… {users_done}/{len(user_ids)} users')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Rebuilt {users_done} timelines ({entries_written} entries)'
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from projects.ranking import refresh_post_scores, refresh_project_scores
+from projects.response_cache import bump_versions
+
+class Command(BaseCommand):
+    help = 'Incrementally recompute hot post scores and trending project scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every row instead of only the ones that changed.')
+        parser.add_argument('--settle-seconds', type=int, default=30,
+                            help='Leave transactions younger than this for the next run.')
+
+    def handle(self, *args, **options):
+        posts = refresh_post_scores(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Rescored {posts} posts'))
+
+        projects = refresh_project_scores(full=options['full'], settle_seconds=options['settle_seconds'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Rescored {projects} projects'))
+
+        # Scores are written with bulk updates, which send no signals
+        if posts:
+            bump_versions('post')
+        if projects:
+            bump_versions('project')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from projects.models import UserProfile
+from projects.suggestions import refresh_suggestions
+
+class Command(BaseCommand):
+    help = 'Recompute friends-of-friends suggestions for users whose follow graph changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Refresh every user, not only the ones marked dirty.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Users computed per batch.')
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.all()
+        if not options['all']:
+            profiles = profiles.filter(suggestions_dirty=True)
+        user_ids = list(profiles.order_by('user_id').values_list('user_id', flat=True))
+        batch_size = max(1, options['batch_size'])
+
+        rows_written = 0
+        for start in range(0, len(user_ids), batch_size):
+            rows_written += refresh_suggestions(user_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Refreshed suggestions for {len(user_ids)} users ({rows_written} candidates)'
+        ))
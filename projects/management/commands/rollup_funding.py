@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from projects.ledger import rollup_project_funding
+
+class Command(BaseCommand):
+    help = 'Roll sharded donation counters up into Project.current_funding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='project_ids',
+                            help='Only roll up this project id (repeatable).')
+
+    def handle(self, *args, **options):
+        updated = rollup_project_funding(options['project_ids'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Rolled up funding for {updated} projects'))
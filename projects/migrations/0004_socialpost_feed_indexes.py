@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0003_userprofile_followers"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="socialpost",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="socialpost_feed_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="socialpost",
+            index=models.Index(
+                fields=["author", "-created_at", "-id"],
+                name="socialpost_author_feed_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    SocialPost = apps.get_model("projects", "SocialPost")
+    Like = apps.get_model("projects", "Like")
+    Comment = apps.get_model("projects", "Comment")
+
+    def count_of(model):
+        counts = (
+            model.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(n=Count("id"))
+            .values("n")
+        )
+        return Coalesce(Subquery(counts), 0)
+
+    SocialPost.objects.update(
+        like_count=count_of(Like),
+        comment_count=count_of(Comment),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0004_socialpost_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="socialpost",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="socialpost",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0007_timelineentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostScore",
+            fields=[
+                (
+                    "post",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="score",
+                        serialize=False,
+                        to="projects.socialpost",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("like_count", models.PositiveIntegerField(default=0)),
+                ("comment_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["-score", "-post"], name="postscore_rank_idx")
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ProjectScore",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="score",
+                        serialize=False,
+                        to="projects.project",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("last_transaction_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-score", "-project"], name="projectscore_rank_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_follow_counts(apps, schema_editor):
+    UserProfile = apps.get_model("projects", "UserProfile")
+    Follow = UserProfile.followers.through
+
+    def count_where(**lookup):
+        counts = (
+            Follow.objects.filter(**lookup)
+            .order_by()
+            .values(*lookup)
+            .annotate(n=Count("id"))
+            .values("n")
+        )
+        return Coalesce(Subquery(counts), 0)
+
+    UserProfile.objects.update(
+        follower_count=count_where(userprofile=OuterRef("pk")),
+        following_count=count_where(user=OuterRef("user_id")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0008_ranking_scores"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="follower_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="following_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_follow_counts, migrations.RunPython.noop),
+    ]
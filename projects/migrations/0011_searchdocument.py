@@ -0,0 +1,137 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:47
+
+from django.db import DatabaseError, migrations, models, transaction
+
+POSTGRES_FORWARD = [
+    "CREATE INDEX IF NOT EXISTS searchdocument_body_fts_idx "
+    "ON projects_searchdocument USING gin (to_tsvector('english', body))",
+]
+POSTGRES_TRIGRAM = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS searchdocument_body_trgm_idx "
+    "ON projects_searchdocument USING gin (body gin_trgm_ops)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS searchdocument_body_trgm_idx",
+    "DROP INDEX IF EXISTS searchdocument_body_fts_idx",
+]
+
+# External-content FTS5 table mirrored from projects_searchdocument by triggers
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE projects_searchdocument_fts USING fts5("
+    "body, content='projects_searchdocument', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER projects_searchdocument_ai AFTER INSERT ON projects_searchdocument BEGIN "
+    "INSERT INTO projects_searchdocument_fts(rowid, body) VALUES (new.id, new.body); END",
+    "CREATE TRIGGER projects_searchdocument_ad AFTER DELETE ON projects_searchdocument BEGIN "
+    "INSERT INTO projects_searchdocument_fts(projects_searchdocument_fts, rowid, body) "
+    "VALUES ('delete', old.id, old.body); END",
+    "CREATE TRIGGER projects_searchdocument_au AFTER UPDATE ON projects_searchdocument BEGIN "
+    "INSERT INTO projects_searchdocument_fts(projects_searchdocument_fts, rowid, body) "
+    "VALUES ('delete', old.id, old.body); "
+    "INSERT INTO projects_searchdocument_fts(rowid, body) VALUES (new.id, new.body); END",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS projects_searchdocument_au",
+    "DROP TRIGGER IF EXISTS projects_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS projects_searchdocument_ai",
+    "DROP TABLE IF EXISTS projects_searchdocument_fts",
+]
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _execute(schema_editor, POSTGRES_FORWARD)
+        # pg_trgm needs CREATE privilege on the database; search still works without it
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                _execute(schema_editor, POSTGRES_TRIGRAM)
+        except DatabaseError:
+            pass
+    elif vendor == "sqlite":
+        # Python builds without FTS5 fall back to LIKE scans in projects/search.py
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                _execute(schema_editor, SQLITE_FORWARD)
+        except DatabaseError:
+            pass
+
+
+def backfill_documents(apps, schema_editor):
+    """Index the rows that exist already; later saves are indexed by signals."""
+    SearchDocument = apps.get_model("projects", "SearchDocument")
+    sources = [
+        ("user", apps.get_model("projects", "UserProfile").objects.values_list("user_id", "user__username", "bio")),
+        ("post", apps.get_model("projects", "SocialPost").objects.values_list("id", "content")),
+        ("project", apps.get_model("projects", "Project").objects.values_list("id", "title", "description")),
+    ]
+    for kind, rows in sources:
+        batch = []
+        for object_id, *text in rows.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+            body = " ".join(part for part in text if part)
+            batch.append(SearchDocument(kind=kind, object_id=object_id, body=body))
+            if len(batch) >= BACKFILL_BATCH_SIZE:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+
+
+def drop_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _execute(schema_editor, POSTGRES_REVERSE)
+    elif vendor == "sqlite":
+        _execute(schema_editor, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0010_suggested_users"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("user", "User"),
+                            ("post", "Post"),
+                            ("project", "Project"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("body", models.TextField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("kind", "object_id")},
+            },
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+        # After the index: on SQLite the FTS5 triggers index the backfilled rows
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
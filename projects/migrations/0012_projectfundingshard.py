@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0011_searchdocument"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectFundingShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("shard", models.PositiveSmallIntegerField()),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="funding_shards",
+                        to="projects.project",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("project", "shard")},
+            },
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_inbox(apps, schema_editor):
+    # Existing threads start out fully read
+    Conversation = apps.get_model("projects", "Conversation")
+    ConversationParticipant = apps.get_model("projects", "ConversationParticipant")
+    Message = apps.get_model("projects", "Message")
+
+    newest = Message.objects.filter(conversation=OuterRef("pk")).order_by("-id")
+    Conversation.objects.update(
+        last_message_id=Subquery(newest.values("id")[:1]),
+        last_message_at=Subquery(newest.values("timestamp")[:1]),
+    )
+
+    rows = []
+    for conversation in Conversation.objects.iterator(chunk_size=1000):
+        for user_id in {conversation.user1_id, conversation.user2_id}:
+            rows.append(
+                ConversationParticipant(
+                    conversation_id=conversation.pk,
+                    user_id=user_id,
+                    last_read_message_id=conversation.last_message_id or 0,
+                    last_message_at=conversation.last_message_at
+                    or conversation.created_at,
+                )
+            )
+    ConversationParticipant.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0016_message_sync_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="projects.message",
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="ConversationParticipant",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_read_message_id", models.BigIntegerField(default=0)),
+                ("unread_count", models.PositiveIntegerField(default=0)),
+                ("last_message_at", models.DateTimeField()),
+                (
+                    "conversation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="participants",
+                        to="projects.conversation",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="conversation_memberships",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-last_message_at", "-conversation"],
+                        name="participant_inbox_idx",
+                    )
+                ],
+                "unique_together": {("conversation", "user")},
+            },
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
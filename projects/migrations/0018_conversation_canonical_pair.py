@@ -0,0 +1,80 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def merge_reversed_pairs(apps, schema_editor):
+    """
+    Store every conversation as (min user, max user). A reversed row whose
+    canonical twin already exists is merged into it: its messages move
+    over, each member keeps the further of their two read markers, and the
+    twin's last message and unread counts are recomputed.
+    """
+    Conversation = apps.get_model("projects", "Conversation")
+    ConversationParticipant = apps.get_model("projects", "ConversationParticipant")
+    Message = apps.get_model("projects", "Message")
+
+    reversed_rows = Conversation.objects.filter(user1__gt=F("user2"))
+    for duplicate in reversed_rows.iterator(chunk_size=1000):
+        keeper = Conversation.objects.filter(
+            user1_id=duplicate.user2_id, user2_id=duplicate.user1_id
+        ).first()
+        if keeper is None:
+            continue
+
+        markers = dict(
+            ConversationParticipant.objects.filter(conversation=duplicate).values_list(
+                "user_id", "last_read_message_id"
+            )
+        )
+        Message.objects.filter(conversation=duplicate).update(conversation=keeper)
+        duplicate.delete()
+
+        newest = Message.objects.filter(conversation=keeper).order_by("-id").first()
+        keeper.last_message_id = newest.id if newest else None
+        keeper.last_message_at = newest.timestamp if newest else None
+        keeper.save(update_fields=["last_message", "last_message_at"])
+
+        for participant in ConversationParticipant.objects.filter(conversation=keeper):
+            marker = max(
+                participant.last_read_message_id, markers.get(participant.user_id, 0)
+            )
+            participant.last_read_message_id = marker
+            participant.unread_count = (
+                Message.objects.filter(conversation=keeper, id__gt=marker)
+                .exclude(sender_id=participant.user_id)
+                .count()
+            )
+            participant.last_message_at = keeper.last_message_at or keeper.created_at
+            participant.save()
+
+    # What is left reversed has no twin: swap the columns in place
+    Conversation.objects.filter(user1__gt=F("user2")).update(
+        user1=F("user2"), user2=F("user1")
+    )
+
+    if schema_editor.connection.vendor == "postgresql":
+        # The writes above leave deferred FK checks queued on projects_conversation,
+        # and AddConstraint's ALTER TABLE refuses to run while trigger events are pending
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0017_conversation_inbox"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_reversed_pairs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="conversation",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("user1__lte", models.F("user2"))),
+                name="conversation_canonical_pair",
+            ),
+        ),
+    ]
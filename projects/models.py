@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
 
 User = get_user_model()
 
@@ -20,6 +21,24 @@ class Project(models.Model):
         return self.title
 
 
+class ProjectFundingShard(models.Model):
+    """
+    One of PROJECT_FUNDING_SHARDS partial funding counters for a project.
+    Donations increment a random shard instead of the Project row, and
+    `manage.py rollup_funding` periodically drains the shards into
+    Project.current_funding (see projects/ledger.py).
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='funding_shards')
+    shard = models.PositiveSmallIntegerField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('project', 'shard')
+
+    def __str__(self):
+        return f"{self.project_id}#{self.shard}: {self.amount}"
+
+
 class Transaction(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_transactions')
     receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_transactions')
@@ -27,10 +46,57 @@ class Transaction(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Per-user statements: each side is one keyset range scan on (timestamp, id)
+            models.Index(fields=['sender', '-timestamp', '-id'], name='transaction_sender_idx'),
+            models.Index(fields=['receiver', '-timestamp', '-id'], name='transaction_receiver_idx'),
+            models.Index(fields=['-timestamp', '-id'], name='transaction_recent_idx'),
+            # Balance audits: "this user's flows after transaction id N"
+            models.Index(fields=['sender', 'id'], name='transaction_sender_seq_idx'),
+            models.Index(fields=['receiver', 'id'], name='transaction_receiver_seq_idx'),
+        ]
+
     def __str__(self):
         return f"{self.sender.username} → {self.receiver.username} | ${self.amount}"
 
 
+class BalanceSnapshot(models.Model):
+    """
+    A user's audited balance as of Transaction `last_transaction_id`.
+    `manage.py audit_balances` checks UserProfile.balance against the snapshot
+    plus only the transactions after it (see projects/balances.py).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='balance_snapshot')
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    last_transaction_id = models.BigIntegerField(default=0)
+    taken_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.balance} @ #{self.last_transaction_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored response for a client-supplied `Idempotency-Key` header, so a
+    retried POST replays the first result instead of repeating the write
+    (see projects/idempotency.py). Rows expire after IDEMPOTENCY_KEY_TTL_HOURS.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'key')
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
+
+
 # -------------------------------
 # User Profile
 # -------------------------------
@@ -52,6 +118,12 @@ class UserProfile(models.Model):
         related_name='following', 
         blank=True
     )
+    # Denormalized follow-graph totals, maintained by projects.graph.follow/unfollow
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # Set when this user's friends-of-friends may have changed; cleared by
+    # `manage.py refresh_suggestions` once SuggestedUser rows are recomputed.
+    suggestions_dirty = models.BooleanField(default=True, db_index=True)
     
     # NOTE: The AUTH_USER_MODEL line you had was incorrect for this model,
     # as Django expects a string reference in settings.py. I've removed it
@@ -62,6 +134,26 @@ class UserProfile(models.Model):
         return self.user.username
 
 
+class SuggestedUser(models.Model):
+    """
+    Precomputed "people you may know": users followed by the people `user`
+    follows, ranked by how many of them do (see projects/suggestions.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='suggestions')
+    candidate = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    mutual_count = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'candidate')
+        indexes = [
+            models.Index(fields=['user', '-mutual_count', 'candidate'], name='suggesteduser_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} -> {self.candidate.username} ({self.mutual_count})"
+
+
 # -------------------------------
 # Social Posts + Engagement
 # -------------------------------
@@ -71,6 +163,18 @@ class SocialPost(models.Model):
     image = models.ImageField(upload_to='social_posts/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized engagement counters, maintained by the Like/Comment signals
+    # in projects/signals.py so the feed never has to COUNT(*) per post.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination for the feed: (created_at, id) DESC
+            models.Index(fields=['-created_at', '-id'], name='socialpost_feed_idx'),
+            models.Index(fields=['author', '-created_at', '-id'], name='socialpost_author_feed_idx'),
+        ]
+
     def __str__(self):
         return f"Post by {self.author.username} on {self.created_at}"
 
@@ -80,6 +184,11 @@ class Like(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id'], name='like_post_page_idx'),
+        ]
+
 
 class Comment(models.Model):
     post = models.ForeignKey(SocialPost, on_delete=models.CASCADE, related_name='comments')
@@ -87,21 +196,135 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id'], name='comment_post_page_idx'),
+        ]
+
+
+# -------------------------------
+# Home Timeline (fan-out-on-write)
+# -------------------------------
+class TimelineEntry(models.Model):
+    """
+    One row per (reader, post) in the reader's materialized home feed.
+    `created_at` is copied from the post so the feed is a single range scan
+    over (owner, created_at, post) without joining SocialPost.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(SocialPost, on_delete=models.CASCADE, related_name='+')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('owner', 'post')
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='timeline_owner_feed_idx'),
+            models.Index(fields=['owner', 'author'], name='timeline_owner_author_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner.username} <- post {self.post_id}"
+
+
+# -------------------------------
+# Ranking (hot posts / trending projects)
+# -------------------------------
+class PostScore(models.Model):
+    """
+    Precomputed "hot" score for a post (see projects/ranking.py).
+    The engagement counters it was computed from are kept alongside so the
+    recompute job can find stale rows with a plain column comparison.
+    """
+    post = models.OneToOneField(SocialPost, on_delete=models.CASCADE, primary_key=True, related_name='score')
+    score = models.FloatField()
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', '-post'], name='postscore_rank_idx'),
+        ]
+
+
+class ProjectScore(models.Model):
+    """
+    Precomputed "trending" score for a project (see projects/ranking.py).
+    `last_transaction_id` is the newest Transaction already folded in.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='score')
+    score = models.FloatField()
+    last_transaction_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', '-project'], name='projectscore_rank_idx'),
+        ]
+
+
+# -------------------------------
+# Search
+# -------------------------------
+class SearchDocument(models.Model):
+    """
+    Denormalized text of a searchable object, kept current by the signals in
+    projects/signals.py. The full-text index over `body` is created per
+    database backend in the migration (Postgres GIN/trigram, SQLite FTS5);
+    see projects/search.py.
+    """
+    KIND_USER = 'user'
+    KIND_POST = 'post'
+    KIND_PROJECT = 'project'
+    KIND_CHOICES = [
+        (KIND_USER, 'User'),
+        (KIND_POST, 'Post'),
+        (KIND_PROJECT, 'Project'),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    body = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
+
 
 # -------------------------------
 # Chat / Messaging
 # -------------------------------
 class Conversation(models.Model):
+    """
+    A two-person thread, stored once per pair with user1_id <= user2_id so
+    (A, B) and (B, A) are the same row. Use projects.inbox.get_or_create_conversation.
+    """
     user1 = models.ForeignKey(User, related_name='conversations_as_user1', on_delete=models.CASCADE)
     user2 = models.ForeignKey(User, related_name='conversations_as_user2', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized newest message, kept current by projects/inbox.py
+    last_message = models.ForeignKey('Message', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ('user1', 'user2')
+        constraints = [
+            models.CheckConstraint(condition=models.Q(user1__lte=models.F('user2')),
+                                   name='conversation_canonical_pair'),
+        ]
 
     def __str__(self):
         return f"Conversation between {self.user1.username} and {self.user2.username}"
 
+    def save(self, *args, **kwargs):
+        if self.user1_id is not None and self.user2_id is not None and self.user1_id > self.user2_id:
+            self.user1_id, self.user2_id = self.user2_id, self.user1_id
+        super().save(*args, **kwargs)
+
 
 class Message(models.Model):
     conversation = models.ForeignKey(Conversation, related_name='messages', on_delete=models.CASCADE)
@@ -109,5 +332,56 @@ class Message(models.Model):
     text = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Incremental sync (id > N) and backward paging (id < N) per conversation
+            models.Index(fields=['conversation', 'id'], name='message_conversation_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender.username}: {self.text[:30]}"
+
+
+class ArchivedMessage(models.Model):
+    """
+    Cold-storage copy of a Message, moved here by `manage.py archive_messages`
+    and keeping the original id. The message views page into this table once
+    a cursor runs past the hot Message rows (see projects/archive.py).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    conversation = models.ForeignKey(Conversation, related_name='archived_messages', on_delete=models.CASCADE)
+    sender = models.ForeignKey(User, related_name='archived_sent_messages', on_delete=models.CASCADE)
+    text = models.TextField()
+    timestamp = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversation', 'id'], name='archivedmessage_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender_id}: {self.text[:30]} (archived)"
+
+
+class ConversationParticipant(models.Model):
+    """
+    One user's side of a Conversation: their read marker and unread count,
+    plus a copy of the conversation's activity time so the inbox is a single
+    range scan on (user, -last_message_at). See projects/inbox.py.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='participants')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_memberships')
+    last_read_message_id = models.BigIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+    # Newest message time, or the conversation's creation time until there is one
+    last_message_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('conversation', 'user')
+        indexes = [
+            models.Index(fields=['user', '-last_message_at', '-conversation'], name='participant_inbox_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.sender.username}: {self.text[:30]}"
\ No newline at end of file
+        return f"{self.user_id} in {self.conversation_id} ({self.unread_count} unread)"
\ No newline at end of file
@@ -0,0 +1,153 @@
+# projects/pagination.py
+import base64
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+# -------------------------------
+# KEYSET (CURSOR) PAGINATION
+# -------------------------------
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    Keep datetimes at full (microsecond) precision. DjangoJSONEncoder cuts
+    them to milliseconds, and a truncated key sorts before every row that
+    shares its millisecond, so those rows would be skipped.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite key, newest first.
+
+    Each page is fetched with `WHERE (f1, f2) < (cursor)` instead of OFFSET,
+    so page N costs the same as page 1 and rows inserted while a client is
+    scrolling never shift the window (no duplicates, no skipped rows).
+
+    Query params: ?cursor=<opaque token>&limit=<n>
+    Response:     {"next": <token or null>, "results": [...]}
+
+    The last field must be unique (normally 'id') so the key is a total order.
+    Views may override the key per request by defining `get_cursor_fields()`.
+    """
+    cursor_fields = ('created_at', 'id')
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 20
+    max_limit = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_cursor_fields(self, view=None):
+        if view is not None and hasattr(view, 'get_cursor_fields'):
+            return tuple(view.get_cursor_fields())
+        return self.cursor_fields
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, self.default_limit))
+        except (TypeError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fields = self.get_cursor_fields(view)
+        self.limit = self.get_limit(request)
+
+        queryset = self.apply_cursor(queryset, request.query_params.get(self.cursor_query_param))
+        rows = list(queryset[:self.limit + 1])
+        return self.build_page(rows)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views: the page is fetched with the async ORM."""
+        self.fields = self.get_cursor_fields(view)
+        self.limit = self.get_limit(request)
+
+        queryset = self.apply_cursor(queryset, request.query_params.get(self.cursor_query_param))
+        rows = [row async for row in queryset[:self.limit + 1]]
+        return self.build_page(rows)
+
+    def apply_cursor(self, queryset, token):
+        """Order the queryset by the key and seek past `token` (if any)."""
+        queryset = queryset.order_by(*[f'-{field}' for field in self.fields])
+        if token:
+            values = self.decode_cursor(queryset, token)
+            queryset = queryset.filter(keyset_filter(self.fields, values))
+        return queryset
+
+    def build_page(self, rows):
+        has_next = len(rows) > self.limit
+        self.page = rows[:self.limit]
+        self.next_cursor = self.encode_cursor(self.page[-1]) if has_next else None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_cursor,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    # -- cursor encoding ------------------------------------------------
+
+    def encode_cursor(self, obj):
+        if isinstance(obj, dict):
+            values = [obj[field] for field in self.fields]
+        else:
+            values = [getattr(obj, field) for field in self.fields]
+        raw = json.dumps(values, cls=CursorJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, queryset, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError(token)
+            return [
+                _field_for(queryset, field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+
+def keyset_filter(fields, values):
+    """
+    Build `(f1, f2, ...) < (v1, v2, ...)` as an OR of prefix equalities,
+    which every database backend can answer from a composite index.
+    """
+    condition = Q()
+    for i, field in enumerate(fields):
+        step = Q(**{f'{field}__lt': values[i]})
+        for prev_field, prev_value in zip(fields[:i], values[:i]):
+            step &= Q(**{prev_field: prev_value})
+        condition |= step
+    return condition
+
+
+def _field_for(queryset, name):
+    """Resolve a cursor field to a model field or an annotation's output field."""
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    return queryset.model._meta.get_field(name)
@@ -0,0 +1,164 @@
+# projects/query_budget.py
+"""
+Per-request SQL instrumentation.
+
+QueryBudgetMiddleware wraps every database call made while a request is
+handled (connection.execute_wrapper) and records three things: the query
+count, the total time spent in the database, and how often each query
+*shape* ran. Two queries have the same shape when their SQL is identical
+after IN-lists are collapsed, which is how an N+1 shows up, e.g. one
+`SELECT ... FROM auth_user WHERE id = %s` per row.
+
+For each request it:
+- adds a `Server-Timing: db;dur=..;desc=".. queries"` header (browser
+  devtools show it next to the request)
+- logs one structured line (logger "projects.query_budget")
+- logs a warning when the view goes over its budget, or when a query
+  shape repeats QUERY_BUDGET_DUPLICATE_THRESHOLD times or more
+
+Streaming responses (the chat event stream, CSV exports) run most of their
+queries while the body is sent, after this middleware has returned. Their
+counts would be partial, so they get no Server-Timing header and no budget
+warnings; the log line is marked `streaming=True` instead.
+
+The budget is settings.QUERY_BUDGET unless the view sets `query_budget`.
+projects/testing.py checks the budgets of every route in projects/urls.py.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def fingerprint(sql):
+    """The query's shape: parameters are already placeholders; IN-lists of any length match."""
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """A connection.execute_wrapper that counts, times and fingerprints queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[fingerprint(sql)] += 1
+
+    def duplicates(self, threshold=None):
+        """[(shape, times)] for shapes run at least `threshold` times, most repeated first."""
+        if threshold is None:
+            threshold = settings.QUERY_BUDGET_DUPLICATE_THRESHOLD
+        return [(shape, times) for shape, times in self.shapes.most_common() if times >= threshold]
+
+
+def get_query_budget(view):
+    """The budget for a URL view callable: its class's `query_budget`, else settings.QUERY_BUDGET."""
+    view_class = getattr(view, 'view_class', None) or getattr(view, 'cls', None)
+    budget = getattr(view_class or view, 'query_budget', None)
+    return settings.QUERY_BUDGET if budget is None else budget
+
+
+# The async path's recorder; sync_to_async copies it into whichever thread runs the ORM
+_current_recorder = ContextVar('query_recorder', default=None)
+
+
+def _record(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install():
+    # Once per connection: requests sharing a thread each still count only their own queries
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        # Connections are per thread, and the async ORM runs this request's
+        # queries in a thread-sensitive worker thread (shared by every event
+        # stream, see streams.shared_sync_thread), so that thread's connection
+        # gets a wrapper that looks the recorder up in the request's context.
+        recorder = QueryRecorder()
+        token = _current_recorder.set(recorder)
+        try:
+            await sync_to_async(_install)()
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        duration_ms = recorder.duration * 1000
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        budget = get_query_budget(match.func) if match else settings.QUERY_BUDGET
+        duplicates = recorder.duplicates()
+        # Only the queries run before the body started streaming are counted
+        streaming = response.streaming
+
+        if settings.QUERY_BUDGET_SERVER_TIMING and not streaming:
+            timing = f'db;dur={duration_ms:.1f};desc="{recorder.count} queries"'
+            if duplicates:
+                timing += f', dbdup;desc="{len(duplicates)} repeated queries"'
+            response['Server-Timing'] = timing
+
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(duration_ms, 1),
+            'budget': budget,
+            'duplicates': len(duplicates),
+            'streaming': streaming,
+        }
+        logger.info(' '.join(f'{key}={value}' for key, value in fields.items()), extra=fields)
+
+        if streaming:
+            return response
+        if recorder.count > budget:
+            logger.warning(
+                f"⚠️ {view_name} ran {recorder.count} queries (budget {budget}) for {request.method} {request.path}",
+                extra=fields,
+            )
+        for shape, times in duplicates:
+            logger.warning(f"⚠️ {view_name} repeated a query {times} times (possible N+1): {shape[:300]}",
+                           extra=fields)
+        return response
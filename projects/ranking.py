@@ -0,0 +1,172 @@
+# projects/ranking.py
+"""
+Hot / trending scores.
+
+Both scores are "time-invariant": the decay is expressed relative to a fixed
+epoch instead of "now", so a row's score only changes when its own inputs
+change. That is what lets `manage.py recompute_scores` touch only the rows
+that changed since the last run while the ordering still favours recent
+activity.
+
+- Posts:    log10(likes + 2*comments) + age_from_epoch / POST_TIME_SCALE
+            (one order of magnitude of engagement ~= POST_TIME_SCALE seconds)
+- Projects: ln( BASELINE * e^(created / PROJECT_TIME_SCALE)
+                + sum(amount / funding_goal * e^(t / PROJECT_TIME_SCALE)) )
+            i.e. an exponentially decayed donation volume relative to the goal,
+            kept in log space so it can be folded in incrementally.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import PostScore, Project, ProjectScore, SocialPost, Transaction
+
+RANKING_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+POST_COMMENT_WEIGHT = 2
+POST_TIME_SCALE = 45000.0            # seconds (12.5h) per 10x engagement
+
+PROJECT_TIME_SCALE = 3 * 86400.0     # donation weight grows e-fold every 3 days
+PROJECT_BASELINE = 0.01              # a new project counts as 1% funded at creation
+
+BULK_BATCH_SIZE = 1000
+
+
+def _seconds_since_epoch(moment):
+    return (moment - RANKING_EPOCH).total_seconds()
+
+
+def _logaddexp(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+# -------------------------------
+# SCORE FORMULAS
+# -------------------------------
+
+def post_hot_score(like_count, comment_count, created_at):
+    engagement = like_count + POST_COMMENT_WEIGHT * comment_count
+    return math.log10(max(engagement, 1)) + _seconds_since_epoch(created_at) / POST_TIME_SCALE
+
+
+def project_baseline_score(created_at):
+    return math.log(PROJECT_BASELINE) + _seconds_since_epoch(created_at) / PROJECT_TIME_SCALE
+
+
+def fold_project_donation(score, amount, funding_goal, timestamp):
+    """Add one donation to a project's log-space trending score."""
+    goal = max(Decimal(funding_goal), Decimal(1))
+    ratio = float(Decimal(amount) / goal)
+    if ratio <= 0:
+        return score
+    return _logaddexp(score, math.log(ratio) + _seconds_since_epoch(timestamp) / PROJECT_TIME_SCALE)
+
+
+# -------------------------------
+# INCREMENTAL RECOMPUTE
+# -------------------------------
+
+def refresh_post_scores(full=False):
+    """
+    Recompute PostScore rows whose post has no score yet or whose counters
+    moved since the score was written. Returns the number of rows written.
+    """
+    posts = SocialPost.objects.all()
+    if not full:
+        posts = posts.filter(
+            Q(score__isnull=True)
+            | ~Q(like_count=F('score__like_count'))
+            | ~Q(comment_count=F('score__comment_count'))
+        )
+
+    written = 0
+    batch = []
+    for post_id, like_count, comment_count, created_at in posts.values_list(
+        'id', 'like_count', 'comment_count', 'created_at'
+    ).iterator(chunk_size=BULK_BATCH_SIZE):
+        batch.append(PostScore(
+            post_id=post_id,
+            score=post_hot_score(like_count, comment_count, created_at),
+            like_count=like_count,
+            comment_count=comment_count,
+        ))
+        if len(batch) >= BULK_BATCH_SIZE:
+            written += _upsert_post_scores(batch)
+            batch = []
+    if batch:
+        written += _upsert_post_scores(batch)
+    return written
+
+
+def _upsert_post_scores(batch):
+    PostScore.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['post'],
+        update_fields=['score', 'like_count', 'comment_count', 'updated_at'],
+    )
+    return len(batch)
+
+
+def refresh_project_scores(full=False, settle_seconds=30):
+    """
+    Fold transactions newer than each project's `last_transaction_id` into its
+    score, and create baseline scores for projects that have none.
+    Transactions younger than `settle_seconds` are left for the next run so
+    rows still committing out of id order are not skipped.
+    Returns the number of projects written.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    # A full rebuild ignores stored watermarks and replays every transaction
+    watermark = Value(0) if full else Coalesce(F('project__score__last_transaction_id'), 0)
+    pending = (
+        Transaction.objects.filter(timestamp__lte=cutoff, id__gt=watermark)
+        .order_by('project_id', 'id')
+        .values_list('project_id', 'id', 'amount', 'timestamp')
+    )
+
+    current = {}
+    if not full:
+        current = {
+            project_id: (score, last_id)
+            for project_id, score, last_id in ProjectScore.objects.filter(
+                project__in=pending.values('project_id')
+            ).values_list('project_id', 'score', 'last_transaction_id')
+        }
+    projects = Project.objects.all()
+    if not full:
+        projects = projects.filter(Q(id__in=pending.values('project_id')) | Q(score__isnull=True))
+    projects = {
+        project_id: (goal, created_at)
+        for project_id, goal, created_at in projects.values_list('id', 'funding_goal', 'created_at')
+    }
+
+    updated = {}
+    for project_id, transaction_id, amount, timestamp in pending.iterator(chunk_size=BULK_BATCH_SIZE):
+        goal, created_at = projects[project_id]
+        score, _ = updated.get(project_id) or current.get(project_id) or (project_baseline_score(created_at), 0)
+        updated[project_id] = (fold_project_donation(score, amount, goal, timestamp), transaction_id)
+
+    for project_id, (goal, created_at) in projects.items():
+        if project_id not in updated and project_id not in current:
+            updated[project_id] = (project_baseline_score(created_at), 0)
+
+    rows = [
+        ProjectScore(project_id=project_id, score=score, last_transaction_id=last_id)
+        for project_id, (score, last_id) in updated.items()
+    ]
+    with transaction.atomic():
+        ProjectScore.objects.bulk_create(
+            rows,
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['project'],
+            update_fields=['score', 'last_transaction_id', 'updated_at'],
+        )
+    return len(rows)
@@ -0,0 +1,208 @@
+# projects/realtime.py
+"""
+Push delivery of chat messages.
+
+New messages are published to a broker after their transaction commits
+(MessageListCreateView.perform_create) and streamed to subscribers by the
+Server-Sent Events view in projects/streams.py, one channel per Conversation.
+
+The broker is chosen by settings.CHAT_BROKER (an import path):
+
+- DatabasePollingBroker:  (default) publish is a no-op; one poller thread per
+                          process reads new Message rows and fans them out to
+                          that process's subscribers. Works across any number
+                          of workers/hosts for one query per poll interval per
+                          process, and is the stand-in until a real pub/sub
+                          service (Redis, NATS, ...) is wired up behind the same
+                          interface.
+- InProcessBroker:        fan-out through asyncio queues inside one process.
+                          Only correct with a single ASGI worker process; a
+                          warning is logged at startup when WEB_CONCURRENCY > 1.
+
+A broker implements `publish(conversation_id, payload)`, called from sync
+code, and `subscribe(conversation_id, after_id)`, an async context manager
+yielding a Subscription whose `get(timeout)` returns the next payload or None.
+"""
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils.module_loading import import_string
+
+from .models import Message
+from .serializers import MessageSerializer
+
+logger = logging.getLogger(__name__)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.CHAT_BROKER)()
+    return _broker
+
+
+def check_broker():
+    """Warn when the configured broker cannot reach every worker (called from ProjectsConfig.ready)."""
+    if settings.CHAT_BROKER.endswith('.InProcessBroker') and settings.WEB_CONCURRENCY > 1:
+        logger.warning(
+            f"⚠️ CHAT_BROKER is InProcessBroker but WEB_CONCURRENCY={settings.WEB_CONCURRENCY}: "
+            f"live chat events only reach clients on the worker that saved the message. "
+            f"Use projects.realtime.DatabasePollingBroker."
+        )
+
+
+def message_payload(message):
+    """The JSON-ready body pushed for a message (same shape as the REST API)."""
+    return dict(MessageSerializer(message).data)
+
+
+def publish_message(message):
+    """Publish `message` to its conversation once the current transaction commits."""
+    payload = message_payload(message)
+    transaction.on_commit(lambda: get_broker().publish(message.conversation_id, payload))
+
+
+# -------------------------------
+# IN-PROCESS BROKER
+# -------------------------------
+
+class _QueueSubscription:
+    def __init__(self, loop, maxsize, after_id=0):
+        self.loop = loop
+        self.after_id = after_id
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def deliver(self, payload):
+        # Runs on the subscriber's event loop. A subscriber that falls this far
+        # behind is cut off; the client reconnects and catches up from the DB.
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        if self.overflowed:
+            raise ConnectionResetError("Subscriber fell behind")
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, conversation_id, payload):
+        self._fan_out(conversation_id, payload)
+
+    def _fan_out(self, conversation_id, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(conversation_id, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, payload)
+
+    @asynccontextmanager
+    async def subscribe(self, conversation_id, after_id=0):
+        subscription = _QueueSubscription(asyncio.get_running_loop(), settings.CHAT_SUBSCRIBER_QUEUE_SIZE, after_id)
+        with self._lock:
+            self._subscribers.setdefault(conversation_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(conversation_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[conversation_id]
+
+
+# -------------------------------
+# DATABASE POLLING BROKER
+# -------------------------------
+
+class DatabasePollingBroker(InProcessBroker):
+    """
+    The committed Message row is the event. A single poller thread per
+    process reads every message newer than its cursor and hands those with a
+    local subscriber to InProcessBroker's queues, so the database sees one
+    primary-key range query per CHAT_BROKER_POLL_INTERVAL per worker (plus
+    one to load any new messages someone here is listening to), however
+    many streams are open. The thread holds one connection while anyone is
+    subscribed and closes it when the last stream goes.
+
+    A subscriber registered before a poll gets the messages that poll reads;
+    anything read before it registered was committed by then, and the
+    stream's backlog replay (which runs after subscribing) picks it up.
+    """
+    poll_batch_size = 500
+
+    def __init__(self):
+        super().__init__()
+        self._poller = None
+        self._cursor = None  # highest Message id fanned out; None while idle
+
+    def publish(self, conversation_id, payload):
+        pass
+
+    @asynccontextmanager
+    async def subscribe(self, conversation_id, after_id=0):
+        with self._lock:
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._run, name='chat-broker-poller', daemon=True)
+                self._poller.start()
+        async with super().subscribe(conversation_id, after_id) as subscription:
+            yield subscription
+
+    def _run(self):
+        while True:
+            try:
+                if self.poll() < self.poll_batch_size:
+                    time.sleep(settings.CHAT_BROKER_POLL_INTERVAL)
+            except DatabaseError as e:
+                logger.error(f"❌ Chat broker poll failed: {e}")
+                connection.close()
+                time.sleep(settings.CHAT_BROKER_POLL_INTERVAL)
+
+    def poll(self):
+        """Fan out one batch of new messages; returns how many rows were read."""
+        with self._lock:
+            after_ids = [sub.after_id for subs in self._subscribers.values() for sub in subs]
+        if not after_ids:
+            if self._cursor is not None:
+                # Idle: give the connection back; the next subscriber restarts the cursor
+                self._cursor = None
+                connection.close()
+            return 0
+        if self._cursor is None:
+            # Nothing at or below the subscribers' own positions is needed, nor
+            # anything past the current end (a stale Last-Event-ID can't skip ahead)
+            newest = Message.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            self._cursor = min(min(after_ids), newest)
+
+        rows = list(
+            Message.objects.filter(id__gt=self._cursor).order_by('id').values_list('id', 'conversation_id')
+            [:self.poll_batch_size]
+        )
+        if not rows:
+            return 0
+        self._cursor = rows[-1][0]
+        with self._lock:
+            wanted = [message_id for message_id, conversation_id in rows if conversation_id in self._subscribers]
+        if wanted:
+            for message in Message.objects.filter(id__in=wanted).select_related('sender').order_by('id'):
+                self._fan_out(message.conversation_id, message_payload(message))
+        return len(rows)
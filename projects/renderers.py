@@ -0,0 +1,37 @@
+# projects/renderers.py
+"""
+JSON rendering through orjson.
+
+FastJSONRenderer takes the place of DRF's JSONRenderer in
+DEFAULT_RENDERER_CLASSES and produces the same bytes. The output is compact
+UTF-8 with U+2028/U+2029 escaped, and DRF's encoder handles every type
+orjson does not format the same way (datetimes, Decimal, lazy strings, ...).
+It falls back to the stock renderer when orjson is not installed, when an
+indented response is requested, or when orjson rejects the data.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same as JSONRenderer: these are valid JSON but break JavaScript string literals
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,159 @@
+# projects/response_cache.py
+"""
+Response cache for anonymous reads of the public list/detail endpoints.
+
+Cached entries are keyed on the view, the full query string (cursor, limit,
+sort, ...) and the current *version* of every model group the response is
+built from ('user', 'post', 'project'). Writes never delete entries; they
+bump the group's version (signals.py, graph.py, ledger.py), so every key
+that depended on it stops matching at once and the stale entries simply
+age out. Versions are bumped after the writing transaction commits, and
+RESPONSE_CACHE_TIMEOUT bounds anything that slips through a race.
+
+Only anonymous requests are cached: authenticated responses carry
+per-viewer fields such as `is_following` and `liked_by_me`.
+
+Version tokens only invalidate anything if every worker reads the same
+ones. With a per-process cache (LocMemCache and WEB_CONCURRENCY > 1) or no
+cache at all (DummyCache), has_shared_versions() is False: responses are
+not cached, conditional.py sends no validators, and a warning is logged at
+startup.
+"""
+import hashlib
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+GROUPS = ('user', 'post', 'project')
+CACHE_HEADER = 'X-Cache'
+PROCESS_LOCAL_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+NO_CACHE = 'django.core.cache.backends.dummy.DummyCache'
+
+
+def has_shared_versions():
+    """True when a version bump is seen by every worker that serves the group."""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend == NO_CACHE:
+        return False
+    return backend != PROCESS_LOCAL_CACHE or settings.WEB_CONCURRENCY <= 1
+
+
+def check_response_cache():
+    """Warn when version tokens are per process (called from ProjectsConfig.ready)."""
+    if not has_shared_versions():
+        logger.warning(
+            f"⚠️ CACHE_BACKEND is {settings.CACHES['default']['BACKEND']} with "
+            f"WEB_CONCURRENCY={settings.WEB_CONCURRENCY}: writes would only invalidate one worker, "
+            f"so the response cache and ETag/Last-Modified are off. Use Redis or Memcached."
+        )
+
+
+def _version_key(group):
+    return f'respcache:version:{group}'
+
+
+def _stats_key(view_name, outcome):
+    return f'respcache:stats:{view_name}:{outcome}'
+
+
+def get_versions(groups):
+    """Current version token of each group; a group seen for the first time gets one."""
+    keys = [_version_key(group) for group in groups]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+        versions.append(str(found[key]))
+    return versions
+
+
+def bump_versions(*groups):
+    """
+    Invalidate every cached response built from `groups`, after the current
+    transaction commits. Versions are timestamps rather than counters, so a
+    version lost to cache eviction can never come back and match an old entry.
+    """
+    def bump():
+        cache.set_many({_version_key(group): time.time_ns() for group in groups}, None)
+    transaction.on_commit(bump)
+
+
+def _count(view_name, outcome):
+    key = _stats_key(view_name, outcome)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_stats(view_names):
+    """{view_name: {"hits": n, "misses": n}} for the given views."""
+    keys = {(name, outcome): _stats_key(name, outcome) for name in view_names for outcome in ('hits', 'misses')}
+    found = cache.get_many(list(keys.values()))
+    return {
+        name: {outcome: found.get(keys[(name, outcome)], 0) for outcome in ('hits', 'misses')}
+        for name in view_names
+    }
+
+
+class ResponseCacheMixin:
+    """
+    Serve anonymous GETs of a DRF view from the cache.
+    `cache_groups` lists the model groups the response is built from.
+    """
+    cache_groups = ()
+    cache_timeout = None
+
+    def get_cache_name(self):
+        return type(self).__name__
+
+    def is_cacheable(self, request):
+        return not request.user.is_authenticated and has_shared_versions()
+
+    def get_response_cache_key(self, request):
+        params = sorted((key, values) for key, values in request.query_params.lists())
+        fingerprint = hashlib.md5(repr((request.path, self.kwargs, params)).encode()).hexdigest()
+        versions = '.'.join(get_versions(self.cache_groups))
+        return f'respcache:{self.get_cache_name()}:{versions}:{fingerprint}'
+
+    def cache_lookup(self, request):
+        """(key, cached Response or None); key is None when the request is not cacheable."""
+        if not self.is_cacheable(request):
+            return None, None
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is None:
+            _count(self.get_cache_name(), 'misses')
+            return key, None
+        _count(self.get_cache_name(), 'hits')
+        return key, Response(data, headers={CACHE_HEADER: 'HIT'})
+
+    def cache_store(self, key, response):
+        if key is not None and response.status_code == 200:
+            timeout = self.cache_timeout if self.cache_timeout is not None else settings.RESPONSE_CACHE_TIMEOUT
+            cache.set(key, response.data, timeout)
+            response[CACHE_HEADER] = 'MISS'
+        return response
+
+    def get(self, request, *args, **kwargs):
+        key, cached = self.cache_lookup(request)
+        if cached is not None:
+            return cached
+        return self.cache_store(key, super().get(request, *args, **kwargs))
+
+    async def aget(self, request, *args, **kwargs):
+        key, cached = await sync_to_async(self.cache_lookup)(request)
+        if cached is not None:
+            return cached
+        response = await super().aget(request, *args, **kwargs)
+        return await sync_to_async(self.cache_store)(key, response)
@@ -0,0 +1,179 @@
+# projects/search.py
+"""
+Ranked full-text search over users, posts and projects.
+
+Every searchable object has one SearchDocument row whose `body` is kept in
+sync on save/delete (projects/signals.py). The text index over that column
+depends on the database, and is created by migration 0011, which also
+indexes the rows that existed before it:
+
+- PostgreSQL: GIN index on to_tsvector('english', body), ranked by ts_rank,
+  plus a pg_trgm index used as a typo-tolerant fallback.
+- SQLite:     FTS5 external-content table, ranked by bm25().
+- Otherwise (or if the index is missing): plain LIKE scan, newest first.
+"""
+import re
+
+from django.db import connection
+
+from .models import Project, SearchDocument, SocialPost, UserProfile
+
+FTS_TABLE = 'projects_searchdocument_fts'
+BULK_BATCH_SIZE = 1000
+
+_capabilities = {}
+
+
+# -------------------------------
+# INDEX MAINTENANCE
+# -------------------------------
+
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def index_profile(profile):
+    index_document(SearchDocument.KIND_USER, profile.user_id, _join(profile.user.username, profile.bio))
+
+
+def index_post(post):
+    index_document(SearchDocument.KIND_POST, post.pk, post.content)
+
+
+def index_project(project):
+    index_document(SearchDocument.KIND_PROJECT, project.pk, _join(project.title, project.description))
+
+
+def index_document(kind, object_id, body):
+    SearchDocument.objects.update_or_create(kind=kind, object_id=object_id, defaults={'body': body or ''})
+
+
+def remove_document(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild_index():
+    """Rewrite every SearchDocument from the source tables. Returns the row count."""
+    sources = [
+        (SearchDocument.KIND_USER,
+         UserProfile.objects.values_list('user_id', 'user__username', 'bio')),
+        (SearchDocument.KIND_POST,
+         SocialPost.objects.values_list('id', 'content')),
+        (SearchDocument.KIND_PROJECT,
+         Project.objects.values_list('id', 'title', 'description')),
+    ]
+    written = 0
+    for kind, rows in sources:
+        batch = []
+        for object_id, *text in rows.iterator(chunk_size=BULK_BATCH_SIZE):
+            batch.append(SearchDocument(kind=kind, object_id=object_id, body=_join(*text)))
+            if len(batch) >= BULK_BATCH_SIZE:
+                written += _upsert(batch)
+                batch = []
+        if batch:
+            written += _upsert(batch)
+    return written
+
+
+def _upsert(batch):
+    SearchDocument.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['body', 'updated_at'],
+    )
+    return len(batch)
+
+
+# -------------------------------
+# QUERYING
+# -------------------------------
+
+def _has_fts5():
+    if 'fts5' not in _capabilities:
+        with connection.cursor() as cursor:
+            _capabilities['fts5'] = FTS_TABLE in connection.introspection.table_names(cursor)
+    return _capabilities['fts5']
+
+
+def _has_trigram():
+    if 'trgm' not in _capabilities:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _capabilities['trgm'] = cursor.fetchone() is not None
+    return _capabilities['trgm']
+
+
+def _kind_clause(kind, column='kind'):
+    if kind:
+        return f' AND {column} = %s', [kind]
+    return '', []
+
+
+def search(query, kind=None, limit=20, offset=0):
+    """
+    Return up to `limit` (kind, object_id, rank) tuples for `query`, best
+    first. Higher rank is better on every backend.
+    """
+    terms = re.findall(r'\w+', query or '')
+    if not terms:
+        return []
+
+    if connection.vendor == 'postgresql':
+        hits = _search_postgres(' '.join(terms), kind, limit, offset)
+        if not hits and offset == 0 and _has_trigram():
+            hits = _search_trigram(' '.join(terms), kind, limit)
+        return hits
+    if connection.vendor == 'sqlite' and _has_fts5():
+        return _search_fts5(terms, kind, limit, offset)
+    return _search_like(terms, kind, limit, offset)
+
+
+def _fetch(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(kind, object_id, float(rank)) for kind, object_id, rank in cursor.fetchall()]
+
+
+def _search_postgres(text, kind, limit, offset):
+    kind_sql, kind_params = _kind_clause(kind)
+    return _fetch(
+        "SELECT kind, object_id, ts_rank(to_tsvector('english', body), q) AS rank "
+        "FROM projects_searchdocument, websearch_to_tsquery('english', %s) q "
+        "WHERE to_tsvector('english', body) @@ q" + kind_sql +
+        " ORDER BY rank DESC, id DESC LIMIT %s OFFSET %s",
+        [text, *kind_params, limit, offset],
+    )
+
+
+def _search_trigram(text, kind, limit):
+    kind_sql, kind_params = _kind_clause(kind)
+    return _fetch(
+        "SELECT kind, object_id, word_similarity(%s, body) AS rank "
+        "FROM projects_searchdocument WHERE %s <%% body" + kind_sql +
+        " ORDER BY rank DESC, id DESC LIMIT %s",
+        [text, text, *kind_params, limit],
+    )
+
+
+def _search_fts5(terms, kind, limit, offset):
+    # Quote every term so user input can't inject FTS5 syntax; '*' = prefix match
+    match = ' '.join('"{}"*'.format(term.replace('"', '')) for term in terms)
+    kind_sql, kind_params = _kind_clause(kind, column='d.kind')
+    return _fetch(
+        f"SELECT d.kind, d.object_id, -bm25({FTS_TABLE}) AS rank "
+        f"FROM {FTS_TABLE} JOIN projects_searchdocument d ON d.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s" + kind_sql +
+        " ORDER BY rank DESC, d.id DESC LIMIT %s OFFSET %s",
+        [match, *kind_params, limit, offset],
+    )
+
+
+def _search_like(terms, kind, limit, offset):
+    documents = SearchDocument.objects.all()
+    for term in terms:
+        documents = documents.filter(body__icontains=term)
+    if kind:
+        documents = documents.filter(kind=kind)
+    rows = documents.order_by('-id').values_list('kind', 'object_id')[offset:offset + limit]
+    return [(kind, object_id, 0.0) for kind, object_id in rows]
@@ -6,10 +6,72 @@ from .models import (
     SocialPost, Like, Comment,
     Conversation, Message
 )
+from .graph import get_following_ids
 import logging
 logger = logging.getLogger(__name__)
 
 
+# -------------------
+# SPARSE FIELDSETS
+# -------------------
+def _name_set(value):
+    return {name.strip() for name in value.split(',') if name.strip()} if value else set()
+
+
+def sparse_params(request):
+    """
+    (fields, expand) from a GET's ?fields=a,b&expand=c. `fields` is None when
+    the response is not restricted, so the full representation is rendered.
+    """
+    query_params = getattr(request, 'query_params', None)
+    if query_params is None or request.method != 'GET':
+        return None, set()
+    fields = _name_set(query_params.get('fields')) or None
+    return fields, _name_set(query_params.get('expand'))
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=id,title limits a top-level serializer to those fields. Under
+    ?fields=, the nested relations in Meta.expandable_fields render as their
+    primary key unless also named in ?expand=. Naming them in ?expand= adds
+    them in full. Nested serializers always render in full.
+
+    Meta.field_relations maps a field to the select_related paths it reads.
+    Views build their joins from it, so fields the client leaves out cost no
+    joins either.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = sparse_params(self.context.get('request'))
+        if fields is None:
+            return
+        wanted = fields | expand
+        for name in list(self.fields):
+            if name not in wanted:
+                self.fields.pop(name)
+        for name in getattr(self.Meta, 'expandable_fields', ()):
+            if name in self.fields and name not in expand:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    @classmethod
+    def renders_field(cls, request, name):
+        fields, expand = sparse_params(request)
+        return fields is None or name in fields or name in expand
+
+    @classmethod
+    def related_paths(cls, request):
+        """The select_related paths needed by the fields rendered for `request`."""
+        fields, expand = sparse_params(request)
+        expandable = getattr(cls.Meta, 'expandable_fields', ())
+        paths = []
+        for name, needed in getattr(cls.Meta, 'field_relations', {}).items():
+            if fields is None or name in expand or (name in fields and name not in expandable):
+                paths.extend(path for path in needed if path not in paths)
+        return paths
+
+
 # -------------------
 # USER + PROFILE
 # -------------------
@@ -84,7 +146,9 @@ class UserSerializer(serializers.ModelSerializer):
         
         # Note: DRF handles deletion of old files when a new one is assigned
 
-        profile.save()
+        # Only write the editable columns: balance and the follow counters are
+        # updated in place by the ledger/graph code and must not be overwritten.
+        profile.save(update_fields=['bio', 'profile_image'])
         return instance
 
 
@@ -92,17 +156,28 @@ class UserSerializer(serializers.ModelSerializer):
 
 # ... (around line 98)
 
-class PublicUserSerializer(serializers.ModelSerializer):
+class PublicUserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     bio = serializers.SerializerMethodField()
     profile_image = serializers.SerializerMethodField()
     
     # ✅ FIX 1: Add is_following field
     is_following = serializers.SerializerMethodField()
+    follower_count = serializers.SerializerMethodField()
+    following_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         # ✅ FIX 2: Add is_following to fields
-        fields = ['id', 'username', 'bio', 'profile_image', 'is_following']
+        fields = [
+            'id', 'username', 'bio', 'profile_image', 'is_following',
+            'follower_count', 'following_count'
+        ]
+        field_relations = {
+            'bio': ('userprofile',),
+            'profile_image': ('userprofile',),
+            'follower_count': ('userprofile',),
+            'following_count': ('userprofile',),
+        }
 
     def get_bio(self, obj):
         try:
@@ -118,27 +193,53 @@ class PublicUserSerializer(serializers.ModelSerializer):
             pass
         return None
 
+    def get_follower_count(self, obj):
+        try:
+            return obj.userprofile.follower_count
+        except (AttributeError, UserProfile.DoesNotExist):
+            return 0
+
+    def get_following_count(self, obj):
+        try:
+            return obj.userprofile.following_count
+        except (AttributeError, UserProfile.DoesNotExist):
+            return 0
+
     # ✅ FIX 3: New method to check if the requesting user is following 'obj' (Fixes Priority 3 initialization)
     def get_is_following(self, obj):
         request = self.context.get('request')
         # Check if we have a request and a logged-in user
-        if request and request.user.is_authenticated:
-            # Prevent checking if the user is following themselves (though the view blocks this)
-            if obj.id == request.user.id:
-                return False
-                
-            try:
-                # Check if the current user is in the target user's followers list.
-                return obj.userprofile.followers.filter(id=request.user.id).exists()
-            except (AttributeError, UserProfile.DoesNotExist):
-                # Safety fallback
-                pass
-        return False
+        if not (request and request.user.is_authenticated):
+            return False
+        # Prevent checking if the user is following themselves (though the view blocks this)
+        if obj.id == request.user.id:
+            return False
+        return obj.id in self._get_following_ids(request.user)
+
+    def _get_following_ids(self, user):
+        """
+        The requesting user's follow set, loaded once and shared by every
+        nested PublicUserSerializer through the root serializer's context
+        (views using FollowingContextMixin pre-populate it).
+        """
+        following_ids = self.context.get('following_ids')
+        if following_ids is None:
+            following_ids = get_following_ids(user.id)
+            self.context['following_ids'] = following_ids
+        return following_ids
+
+class SuggestedUserSerializer(PublicUserSerializer):
+    """A suggested user plus how many of the people I follow also follow them."""
+    mutual_count = serializers.IntegerField(read_only=True)
+
+    class Meta(PublicUserSerializer.Meta):
+        fields = PublicUserSerializer.Meta.fields + ['mutual_count']
+
 
 # -------------------
 # PROJECTS + FUNDING
 # -------------------
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Pass the request context down to PublicUserSerializer
     owner = PublicUserSerializer(read_only=True, context={'request': serializers.CurrentUserDefault()}) 
     owner_username = serializers.CharField(source='owner.username', read_only=True)
@@ -150,9 +251,11 @@ class ProjectSerializer(serializers.ModelSerializer):
             'funding_goal', 'current_funding',
             'owner', 'owner_username', 'created_at'
         ]
+        expandable_fields = ('owner',)
+        field_relations = {'owner': ('owner__userprofile',), 'owner_username': ('owner',)}
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     sender_username = serializers.CharField(source='sender.username', read_only=True)
     receiver_username = serializers.CharField(source='receiver.username', read_only=True)
     project_title = serializers.CharField(source='project.title', read_only=True)
@@ -160,28 +263,37 @@ class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = '__all__'
+        field_relations = {
+            'sender_username': ('sender',),
+            'receiver_username': ('receiver',),
+            'project_title': ('project',),
+        }
 
 
 # -------------------
 # SOCIAL POSTS
 # -------------------
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = PublicUserSerializer(read_only=True)
 
     class Meta:
         model = Comment
         fields = ['id', 'user', 'content', 'created_at']
+        expandable_fields = ('user',)
+        field_relations = {'user': ('user__userprofile',)}
 
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = PublicUserSerializer(read_only=True)
 
     class Meta:
         model = Like
         fields = ['id', 'user', 'created_at']
+        expandable_fields = ('user',)
+        field_relations = {'user': ('user__userprofile',)}
 
 
-class SocialPostSerializer(serializers.ModelSerializer):
+class SocialPostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = PublicUserSerializer(read_only=True)
     # Ensure likes and comments are retrieved correctly if implemented in models
     likes = LikeSerializer(many=True, read_only=True) 
@@ -189,27 +301,81 @@ class SocialPostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = SocialPost
-        fields = ['id', 'author', 'content', 'image', 'created_at', 'likes', 'comments']
+        fields = [
+            'id', 'author', 'content', 'image', 'created_at',
+            'like_count', 'comment_count', 'likes', 'comments'
+        ]
+        read_only_fields = ['like_count', 'comment_count']
+        expandable_fields = ('author',)
+        field_relations = {'author': ('author__userprofile',)}
+
+
+class SocialPostSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Lightweight feed representation (?mode=summary): counters instead of the
+    full likes/comments lists, plus at most 3 recent comment previews.
+    Expects the queryset to annotate `liked_by_me` and prefetch
+    `comment_previews` (see SocialPostListCreateView.get_queryset).
+    """
+    author = PublicUserSerializer(read_only=True)
+    liked_by_me = serializers.BooleanField(read_only=True)
+    comment_previews = CommentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = SocialPost
+        fields = [
+            'id', 'author', 'content', 'image', 'created_at',
+            'like_count', 'comment_count', 'liked_by_me', 'comment_previews'
+        ]
+        read_only_fields = ['like_count', 'comment_count']
+        expandable_fields = ('author',)
+        field_relations = {'author': ('author__userprofile',)}
 
 
 # -------------------
 # MESSAGING
 # -------------------
 # ✅ ADDED: This was missing and caused the ImportError
-class ConversationSerializer(serializers.ModelSerializer):
+class LastMessageSerializer(serializers.ModelSerializer):
+    """Inbox preview of a conversation's newest message."""
+    sender_username = serializers.CharField(source='sender.username', read_only=True)
+
+    class Meta:
+        model = Message
+        fields = ['id', 'sender', 'sender_username', 'text', 'timestamp']
+
+
+class ConversationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user1_username = serializers.CharField(source='user1.username', read_only=True)
     user2_username = serializers.CharField(source='user2.username', read_only=True)
+    last_message = LastMessageSerializer(read_only=True)
+    unread_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
-        fields = ['id', 'user1', 'user2', 'user1_username', 'user2_username', 'created_at']
+        fields = [
+            'id', 'user1', 'user2', 'user1_username', 'user2_username', 'created_at',
+            'last_message', 'last_message_at', 'unread_count'
+        ]
+        read_only_fields = ['user1', 'last_message_at']
+        expandable_fields = ('last_message',)
+        field_relations = {
+            'user1_username': ('user1',),
+            'user2_username': ('user2',),
+            'last_message': ('last_message__sender',),
+        }
+
+    def get_unread_count(self, obj):
+        # Set from the requesting user's ConversationParticipant row by the inbox view
+        return getattr(obj, 'unread_count', 0)
 
 # ✅ FIX: MessageSerializer now correctly maps fields for the chat system to work with views.py
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     sender_username = serializers.CharField(source='sender.username', read_only=True)
 
     class Meta:
         model = Message
         # Ensure 'text' is writeable, and 'conversation' is read/write
         fields = ['id', 'conversation', 'sender', 'sender_username', 'text', 'timestamp']
-        read_only_fields = ['sender'] # Sender is set automatically in MessageListCreateView
\ No newline at end of file
+        read_only_fields = ['sender', 'conversation'] # Both are set by MessageListCreateView from the request/URL
+        field_relations = {'sender_username': ('sender',)}
@@ -1,8 +1,19 @@
 # projects/signals.py
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import (
+    UserProfile, Project, SocialPost, Like, Comment, PostScore, ProjectScore, SearchDocument,
+    Conversation, Message
+)
+from .inbox import add_participants, record_message
+from .response_cache import bump_versions
+from .ranking import post_hot_score, project_baseline_score
+from .search import index_post, index_profile, index_project, remove_document
+from .timeline import fan_out_post
 
 
 @receiver(post_save, sender=User)
@@ -10,10 +21,159 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
     """
     Ensure every User has a linked UserProfile.
     - On creation: make a new UserProfile.
-    - On update: ensure it exists and save it.
+    - On update: ensure it exists and refresh its search document.
+    The profile row itself is not re-saved: balance and the follow counters
+    are updated in place elsewhere and a full-row save would overwrite them.
     """
     if created:
         UserProfile.objects.create(user=instance)
     else:
         profile, _ = UserProfile.objects.get_or_create(user=instance)
-        profile.save()
+        index_profile(profile)
+
+
+# -------------------------------
+# HOME TIMELINE FAN-OUT
+# -------------------------------
+
+@receiver(post_save, sender=SocialPost)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """Copy a new post into followers' home timelines once it has committed."""
+    if created:
+        transaction.on_commit(lambda: fan_out_post(instance))
+
+
+# -------------------------------
+# RANKING SEEDS
+# -------------------------------
+# New rows get an initial score immediately so they show up in ?sort=hot /
+# ?sort=trending before the next `recompute_scores` run.
+
+@receiver(post_save, sender=SocialPost)
+def seed_post_score(sender, instance, created, **kwargs):
+    if created:
+        PostScore.objects.create(
+            post=instance,
+            score=post_hot_score(instance.like_count, instance.comment_count, instance.created_at),
+            like_count=instance.like_count,
+            comment_count=instance.comment_count,
+        )
+
+
+@receiver(post_save, sender=Project)
+def seed_project_score(sender, instance, created, **kwargs):
+    if created:
+        ProjectScore.objects.create(project=instance, score=project_baseline_score(instance.created_at))
+
+
+# -------------------------------
+# ENGAGEMENT COUNTERS
+# -------------------------------
+# SocialPost.like_count / comment_count are adjusted with F() expressions so
+# concurrent likes never overwrite each other. The update runs inside the
+# caller's transaction, so the counter commits or rolls back with the row.
+
+def _bump_post_counter(post_id, field, delta):
+    # Greatest() keeps the unsigned column from underflowing if it ever drifted
+    SocialPost.objects.filter(pk=post_id).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+@receiver(post_save, sender=Like)
+def increment_like_count(sender, instance, created, **kwargs):
+    if created:
+        _bump_post_counter(instance.post_id, 'like_count', 1)
+
+
+@receiver(post_delete, sender=Like)
+def decrement_like_count(sender, instance, **kwargs):
+    _bump_post_counter(instance.post_id, 'like_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        _bump_post_counter(instance.post_id, 'comment_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    _bump_post_counter(instance.post_id, 'comment_count', -1)
+
+
+# -------------------------------
+# SEARCH INDEX
+# -------------------------------
+# A user's document (username + bio) is written from UserProfile saves and,
+# for username changes, from the User signal above.
+
+@receiver(post_save, sender=UserProfile)
+def index_profile_on_save(sender, instance, **kwargs):
+    index_profile(instance)
+
+
+@receiver(post_delete, sender=UserProfile)
+def unindex_profile(sender, instance, **kwargs):
+    remove_document(SearchDocument.KIND_USER, instance.user_id)
+
+
+@receiver(post_save, sender=SocialPost)
+def index_post_on_save(sender, instance, **kwargs):
+    index_post(instance)
+
+
+@receiver(post_delete, sender=SocialPost)
+def unindex_post(sender, instance, **kwargs):
+    remove_document(SearchDocument.KIND_POST, instance.pk)
+
+
+@receiver(post_save, sender=Project)
+def index_project_on_save(sender, instance, **kwargs):
+    index_project(instance)
+
+
+@receiver(post_delete, sender=Project)
+def unindex_project(sender, instance, **kwargs):
+    remove_document(SearchDocument.KIND_PROJECT, instance.pk)
+
+
+# -------------------------------
+# CONVERSATION INBOX
+# -------------------------------
+# Participant rows and the denormalized last message / unread counts commit
+# with the conversation or message that changed them (projects/inbox.py).
+
+@receiver(post_save, sender=Conversation)
+def create_conversation_participants(sender, instance, created, **kwargs):
+    if created:
+        add_participants(instance)
+
+
+@receiver(post_save, sender=Message)
+def record_new_message(sender, instance, created, **kwargs):
+    if created:
+        record_message(instance)
+
+
+# -------------------------------
+# RESPONSE CACHE INVALIDATION
+# -------------------------------
+# Bumping a group's version retires every cached anonymous response built
+# from it (projects/response_cache.py). Writes that bypass signals (F()
+# counter updates, bulk jobs) bump explicitly where they happen.
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_user_responses(sender, **kwargs):
+    bump_versions('user')
+
+
+@receiver([post_save, post_delete], sender=Project)
+def invalidate_project_responses(sender, **kwargs):
+    bump_versions('project')
+
+
+@receiver([post_save, post_delete], sender=SocialPost)
+@receiver([post_save, post_delete], sender=Like)
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_post_responses(sender, **kwargs):
+    bump_versions('post')
@@ -0,0 +1,138 @@
+# projects/streams.py
+"""
+Server-Sent Events endpoint for live chat (served by doomscrollr/asgi.py).
+
+    GET /api/conversations/<id>/events/?access_token=<jwt>&after_id=<id>
+
+Each connection is one coroutine parked on its broker subscription, so a
+worker holds thousands of idle clients without a thread per client. A
+stream only touches the database until its backlog is replayed; then it
+closes its connection, and new messages arrive through the broker. The
+browser EventSource API cannot send an Authorization header, so the access
+token may also be passed as ?access_token=. On reconnect EventSource sends
+Last-Event-ID, and everything newer is replayed from the database first.
+
+doomscrollr/asgi.py wraps the application in shared_sync_thread(): Django
+gives every request an executor thread of its own for its sync work, which
+an event stream would keep until the client leaves.
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.sync import SyncToAsync, ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import Resolver404, resolve
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .models import ConversationParticipant, Message
+from .realtime import get_broker, message_payload
+
+logger = logging.getLogger(__name__)
+
+
+# Never entered: the key under which every event stream shares one sync thread
+_STREAMS_SYNC_CONTEXT = ThreadSensitiveContext()
+
+
+def shared_sync_thread(application):
+    """
+    ASGI wrapper that runs the sync work of every event stream (auth, the
+    participant check, the backlog, Django's request signals) on one thread
+    per process. ThreadSensitiveContext only takes effect when none is set
+    yet, so presetting the shared one keeps Django from opening a context,
+    and with it a thread, per stream.
+    """
+    async def app(scope, receive, send):
+        if scope['type'] == 'http' and _is_event_stream(scope['path']):
+            SyncToAsync.thread_sensitive_context.set(_STREAMS_SYNC_CONTEXT)
+        await application(scope, receive, send)
+    return app
+
+
+def _is_event_stream(path):
+    try:
+        return resolve(path).url_name == 'conversation-events'
+    except Resolver404:
+        return False
+
+
+def _authenticate(request):
+    """Return the user for the request's JWT (header or ?access_token=), or None."""
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else request.GET.get('access_token')
+    if not raw_token:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _close_connection():
+    # Runs in the request's thread, whose connection did the auth and backlog reads
+    connection.close()
+
+
+def _event(payload):
+    body = json.dumps(payload, cls=DjangoJSONEncoder)
+    return f"id: {payload['id']}\nevent: message\ndata: {body}\n\n"
+
+
+async def conversation_events(request, conversation_id):
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+
+    if not await ConversationParticipant.objects.filter(conversation_id=conversation_id, user=user).aexists():
+        return JsonResponse({"error": "Conversation not found"}, status=404)
+
+    after_id = request.headers.get('Last-Event-ID') or request.GET.get('after_id')
+    try:
+        after_id = int(after_id) if after_id else None
+    except ValueError:
+        return JsonResponse({"error": "after_id must be a number"}, status=400)
+    if after_id is None:
+        # New stream: start from the current end of the conversation
+        latest = await Message.objects.filter(conversation_id=conversation_id).order_by('-id').afirst()
+        after_id = latest.id if latest else 0
+
+    response = StreamingHttpResponse(_stream(conversation_id, after_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
+
+
+async def _stream(conversation_id, after_id):
+    yield f"retry: {settings.CHAT_SSE_RETRY_MS}\n\n"
+    async with get_broker().subscribe(conversation_id, after_id) as subscription:
+        # Subscribe first, then replay the backlog, so nothing committed in
+        # between is missed; duplicates are dropped by id.
+        backlog = Message.objects.filter(
+            conversation_id=conversation_id, id__gt=after_id
+        ).select_related('sender').order_by('id')
+        async for message in backlog:
+            after_id = message.id
+            yield _event(message_payload(message))
+        # An idle stream would otherwise keep this connection until the client leaves
+        await sync_to_async(_close_connection)()
+
+        try:
+            while True:
+                payload = await subscription.get(settings.CHAT_SSE_HEARTBEAT_SECONDS)
+                if payload is None:
+                    yield ": ping\n\n"  # keep proxies from closing an idle stream
+                elif payload['id'] > after_id:
+                    after_id = payload['id']
+                    yield _event(payload)
+        except ConnectionResetError:
+            # Dropped for falling behind; EventSource reconnects with Last-Event-ID
+            return
+        except asyncio.CancelledError:
+            logger.debug(f"Event stream for conversation {conversation_id} closed")
+            raise
@@ -0,0 +1,86 @@
+# projects/suggestions.py
+"""
+Friends-of-friends suggestions.
+
+Candidates for a user are the people followed by the people they follow,
+ranked by how many of their followees follow each candidate ("mutuals"),
+excluding themselves and anyone they already follow. The result is stored
+in SuggestedUser so /api/users/suggested/ is one indexed lookup.
+
+Follow/unfollow only flips UserProfile.suggestions_dirty for the affected
+users; `manage.py refresh_suggestions` recomputes just those in batches.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from .graph import Follow
+from .models import SuggestedUser, UserProfile
+
+SUGGESTIONS_PER_USER = 50
+BULK_BATCH_SIZE = 1000
+
+
+def mark_suggestions_dirty(follower_id):
+    """
+    `follower_id` followed/unfollowed someone: their own candidates changed,
+    and so did the candidates of everyone who follows them.
+    """
+    followers_of_follower = Follow.objects.filter(userprofile__user_id=follower_id).values('user_id')
+    UserProfile.objects.filter(
+        Q(user_id=follower_id) | Q(user_id__in=followers_of_follower)
+    ).update(suggestions_dirty=True)
+
+
+def dismiss_suggestion(user_id, candidate_id):
+    """Drop a candidate the user has just followed, without waiting for a refresh."""
+    SuggestedUser.objects.filter(user_id=user_id, candidate_id=candidate_id).delete()
+
+
+def _out_edges(user_ids):
+    """{user_id: set(followed user ids)} for the given users, in one query."""
+    edges = defaultdict(set)
+    for follower_id, followee_id in Follow.objects.filter(
+        user_id__in=user_ids
+    ).values_list('user_id', 'userprofile__user_id').iterator(chunk_size=BULK_BATCH_SIZE):
+        edges[follower_id].add(followee_id)
+    return edges
+
+
+def compute_suggestions(user_ids):
+    """Return SuggestedUser rows (unsaved) for a batch of users."""
+    first_hop = _out_edges(user_ids)
+    second_hop = _out_edges({v for followees in first_hop.values() for v in followees})
+
+    rows = []
+    for user_id in user_ids:
+        following = first_hop.get(user_id, set())
+        mutuals = Counter(
+            candidate_id
+            for followee_id in following
+            for candidate_id in second_hop.get(followee_id, ())
+            if candidate_id != user_id and candidate_id not in following
+        )
+        ranked = sorted(mutuals.items(), key=lambda item: (-item[1], item[0]))[:SUGGESTIONS_PER_USER]
+        rows += [
+            SuggestedUser(user_id=user_id, candidate_id=candidate_id, mutual_count=count)
+            for candidate_id, count in ranked
+        ]
+    return rows
+
+
+def refresh_suggestions(user_ids):
+    """
+    Recompute and replace the stored suggestions for `user_ids`.
+    The dirty flag is cleared before the edges are read, so a follow that
+    lands mid-refresh marks the user dirty again for the next run.
+    Returns the number of SuggestedUser rows written.
+    """
+    user_ids = list(user_ids)
+    UserProfile.objects.filter(user_id__in=user_ids).update(suggestions_dirty=False)
+    rows = compute_suggestions(user_ids)
+    with transaction.atomic():
+        SuggestedUser.objects.filter(user_id__in=user_ids).delete()
+        SuggestedUser.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+    return len(rows)
@@ -0,0 +1,70 @@
+# projects/testing.py
+"""
+Helpers for asserting query budgets from a test suite or a shell.
+
+    from projects.testing import assert_query_budgets
+
+    client.force_login(user)   # or set HTTP_AUTHORIZATION on the client
+    assert_query_budgets(client, {'pk': user.pk, 'post_id': post.pk,
+                                  'conversation_id': conversation.pk})
+
+Every named route in projects/urls.py is requested with GET. The queries it
+runs are counted the same way QueryBudgetMiddleware counts them and compared
+with that view's budget. Seed enough rows (a full page of posts with likes
+and comments, several followed users, ...) for an N+1 to stand out.
+"""
+from django.db import connection
+from django.urls import URLPattern, get_resolver, reverse
+
+from .query_budget import QueryRecorder, get_query_budget
+
+# Long-lived streams never finish a request
+DEFAULT_EXCLUDE = ('conversation-events',)
+
+
+def iter_routes(urlconf='projects.urls'):
+    """(name, URL kwarg names, view) for every named route in `urlconf`."""
+    for pattern in get_resolver(urlconf).url_patterns:
+        if isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name, tuple(pattern.pattern.converters), pattern.callback
+
+
+def measure_route(client, name, kwargs=None, data=None):
+    """(response, QueryRecorder) for one GET of the named route."""
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        response = client.get(reverse(name, kwargs=kwargs or None), data)
+        if response.streaming:
+            # A streamed body runs its queries as it is read
+            b''.join(response.streaming_content)
+    return response, recorder
+
+
+def assert_query_budgets(client, url_kwargs=None, exclude=DEFAULT_EXCLUDE, urlconf='projects.urls'):
+    """
+    GET every route in `urlconf` and fail if any runs more queries than its
+    budget. `url_kwargs` supplies values for path parameters ('pk',
+    'post_id', ...); routes needing one that is missing are skipped.
+    Returns {route name: query count}, with None for skipped routes.
+    """
+    url_kwargs = url_kwargs or {}
+    counts, failures = {}, []
+    for name, params, view in iter_routes(urlconf):
+        if name in exclude:
+            continue
+        if any(param not in url_kwargs for param in params):
+            counts[name] = None
+            continue
+        response, recorder = measure_route(client, name, {param: url_kwargs[param] for param in params})
+        counts[name] = recorder.count
+        budget = get_query_budget(view)
+        if recorder.count > budget:
+            repeated = '; '.join(f'{times}x {shape[:120]}' for shape, times in recorder.duplicates())
+            failures.append(
+                f'{name} (HTTP {response.status_code}): {recorder.count} queries, budget {budget}'
+                + (f' (repeated: {repeated})' if repeated else '')
+            )
+
+    if failures:
+        raise AssertionError('Query budget exceeded:\n  ' + '\n  '.join(failures))
+    return counts
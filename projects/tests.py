@@ -0,0 +1,827 @@
+# projects/tests.py
+import asyncio
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from contextlib import AsyncExitStack
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date
+from rest_framework.test import APITestCase
+
+from .archive import archive_messages
+from .graph import follow
+from .inbox import get_or_create_conversation
+from .ledger import InsufficientFunds, credit_project, rollup_project_funding, transfer
+from .models import (
+    Comment, Conversation, IdempotencyKey, Like, Message, Project, ProjectFundingShard, SocialPost, TimelineEntry,
+    Transaction, UserProfile,
+)
+from .realtime import DatabasePollingBroker, check_broker
+from .response_cache import check_response_cache
+from .search import search
+from .suggestions import refresh_suggestions
+from .testing import DEFAULT_EXCLUDE, assert_query_budgets, iter_routes
+
+
+# -------------------------------
+# HELPERS
+# -------------------------------
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class APICacheTestCase(APITestCase):
+    """Start every test with an empty cache (response cache, graph cache, version tokens)."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def make_user(self, username, balance=0):
+        user = User.objects.create_user(username, f'{username}@example.com', 'pw-12345')
+        UserProfile.objects.update_or_create(user=user, defaults={'balance': balance})
+        return user
+
+    def page_through(self, url, key='id'):
+        """Follow `next` cursors from `url`; returns every result's `key`, in order."""
+        seen = []
+        separator = '&' if '?' in url else '?'
+        response = self.client.get(url)
+        while True:
+            self.assertEqual(response.status_code, 200, response.content)
+            seen += [row[key] for row in response.data['results']]
+            if not response.data['next']:
+                return seen
+            response = self.client.get(f"{url}{separator}cursor={response.data['next']}")
+
+
+# -------------------------------
+# KEYSET PAGINATION
+# -------------------------------
+
+class KeysetPaginationTests(APICacheTestCase):
+    def test_feed_pages_through_posts_sharing_a_timestamp(self):
+        author = self.make_user('author')
+        posts = [SocialPost.objects.create(author=author, content=str(i)) for i in range(10)]
+        # All in one millisecond, half of them on the exact same microsecond
+        base = timezone.now().replace(microsecond=123456)
+        stamps = {post.pk: base + timedelta(microseconds=i % 2) for i, post in enumerate(posts)}
+        for pk, stamp in stamps.items():
+            SocialPost.objects.filter(pk=pk).update(created_at=stamp)
+
+        seen = self.page_through('/api/social-posts/?limit=3')
+
+        self.assertEqual(seen, sorted(stamps, key=lambda pk: (stamps[pk], pk), reverse=True))
+
+
+# -------------------------------
+# TRANSACTION STATEMENT
+# -------------------------------
+
+class TransactionStatementTests(APICacheTestCase):
+    def test_statement_pages_through_a_same_timestamp_batch(self):
+        sender = self.make_user('sender', balance=1000)
+        receivers = [self.make_user(f'receiver{i}') for i in range(3)]
+        project = Project.objects.create(owner=receivers[0], title='p', description='d', funding_goal=10)
+        self.client.force_authenticate(sender)
+
+        # One bulk_create: the whole batch shares (nearly) one timestamp
+        transfers = [{"receiver": receivers[i % 3].pk, "project": project.pk, "amount": "1.00"} for i in range(30)]
+        response = self.client.post('/api/transactions/batch/', {"transfers": transfers}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        # A received transfer appears on the same statement
+        Transaction.objects.create(sender=receivers[1], receiver=sender, project=project, amount=Decimal('2.00'))
+
+        seen = self.page_through('/api/transactions/?user=me&limit=5')
+
+        expected = Transaction.objects.filter(pk__in=seen).order_by('-timestamp', '-id').values_list('id', flat=True)
+        self.assertEqual(len(seen), 31)
+        self.assertEqual(seen, list(expected))
+
+
+# -------------------------------
+# MESSAGE SYNC
+# -------------------------------
+
+class MessageSyncTests(APICacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.me, self.other = self.make_user('me'), self.make_user('other')
+        self.conversation, _ = get_or_create_conversation(self.me.pk, self.other.pk)
+        self.messages = [
+            Message.objects.create(conversation=self.conversation, sender=self.other, text=str(i)) for i in range(7)
+        ]
+        self.client.force_authenticate(self.me)
+        self.url = f'/api/conversations/{self.conversation.pk}/messages/'
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['id'] for row in response.data]
+
+    def test_latest_page_then_older_then_newer(self):
+        ids = [message.pk for message in self.messages]
+        self.assertEqual(self.ids(self.client.get(f'{self.url}?limit=3')), ids[-3:])
+        self.assertEqual(self.ids(self.client.get(f'{self.url}?limit=3&before_id={ids[-3]}')), ids[-6:-3])
+        self.assertEqual(self.ids(self.client.get(f'{self.url}?after_id={ids[2]}')), ids[3:])
+
+    def test_paging_back_crosses_into_the_archive(self):
+        ids = [message.pk for message in self.messages]
+        Message.objects.filter(pk__in=ids[:4]).update(timestamp=timezone.now() - timedelta(days=90))
+        self.assertEqual(archive_messages(older_than_days=30, batch_size=3), 4)
+
+        seen, page = [], self.ids(self.client.get(f'{self.url}?limit=2'))
+        while page:
+            seen = page + seen
+            page = self.ids(self.client.get(f'{self.url}?limit=2&before_id={page[0]}'))
+        self.assertEqual(seen, ids)
+        self.assertEqual(self.ids(self.client.get(f'{self.url}?limit=3&after_id={ids[1]}')), ids[2:5])
+
+    @override_settings(MESSAGE_LONG_POLL_SYNC_MAX_WAIT=0.2, MESSAGE_LONG_POLL_INTERVAL=0.05)
+    def test_sync_long_poll_is_capped(self):
+        started = time.monotonic()
+        response = self.client.get(f'{self.url}?after_id={self.messages[-1].pk}&wait=25')
+        self.assertEqual(self.ids(response), [])
+        self.assertLess(time.monotonic() - started, 2)
+
+
+# -------------------------------
+# CONVERSATION PAIRS
+# -------------------------------
+
+class ConversationPairTests(APICacheTestCase):
+    def test_either_order_returns_the_same_conversation(self):
+        a, b = self.make_user('a'), self.make_user('b')
+        conversation, created = get_or_create_conversation(a.pk, b.pk)
+        again, created_again = get_or_create_conversation(b.pk, a.pk)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, conversation.pk)
+        self.assertEqual(Conversation.objects.count(), 1)
+
+
+class CanonicalPairMigrationTests(TransactionTestCase):
+    """0018 merges reversed conversations into their canonical twin and swaps the rest."""
+    before = [('projects', '0017_conversation_inbox')]
+    after = [('projects', '0018_conversation_canonical_pair')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.apps = executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_reversed_pairs_are_merged_or_swapped(self):
+        User = self.apps.get_model('auth', 'User')
+        Conversation = self.apps.get_model('projects', 'Conversation')
+        Participant = self.apps.get_model('projects', 'ConversationParticipant')
+        Message = self.apps.get_model('projects', 'Message')
+        a, b, c = [User.objects.create(username=name) for name in 'abc']
+
+        def conversation(user1, user2, texts):
+            thread = Conversation.objects.create(user1=user1, user2=user2)
+            messages = [Message.objects.create(conversation=thread, sender=sender, text=text)
+                        for sender, text in texts]
+            for user in (user1, user2):
+                Participant.objects.create(conversation=thread, user=user, last_message_at=thread.created_at)
+            return thread, messages
+
+        keeper, _ = conversation(a, b, [(a, 'k1'), (b, 'k2')])
+        _, moved = conversation(b, a, [(b, 'r1'), (a, 'r2')])
+        # b has read everything up to r1 in the reversed row, a nothing anywhere
+        Participant.objects.filter(conversation__user1=b, user=b).update(last_read_message_id=moved[0].pk)
+        lonely, _ = conversation(c, a, [(c, 'l1')])
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        Conversation = apps.get_model('projects', 'Conversation')
+        Participant = apps.get_model('projects', 'ConversationParticipant')
+        Message = apps.get_model('projects', 'Message')
+
+        self.assertEqual(
+            sorted(Conversation.objects.values_list('user1_id', 'user2_id')), [(a.pk, b.pk), (a.pk, c.pk)]
+        )
+        self.assertEqual(Conversation.objects.get(pk=lonely.pk).user1_id, a.pk)
+
+        keeper = Conversation.objects.get(pk=keeper.pk)
+        self.assertEqual(
+            list(Message.objects.filter(conversation=keeper).order_by('id').values_list('text', flat=True)),
+            ['k1', 'k2', 'r1', 'r2'],
+        )
+        self.assertEqual(keeper.last_message_id, moved[-1].pk)
+        markers = {row.user_id: row for row in Participant.objects.filter(conversation=keeper)}
+        self.assertEqual(markers[b.pk].last_read_message_id, moved[0].pk)
+        self.assertEqual(markers[b.pk].unread_count, 1)  # r2
+        self.assertEqual(markers[a.pk].unread_count, 2)  # k2, r1
+
+
+# -------------------------------
+# FOLLOWS
+# -------------------------------
+
+class FollowTests(APICacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice, self.bob = self.make_user('alice'), self.make_user('bob')
+        self.client.force_authenticate(self.alice)
+
+    def test_toggle_returns_the_new_state(self):
+        response = self.client.post(f'/api/users/{self.bob.pk}/follow/')
+        self.assertEqual((response.data['action'], response.data['is_following']), ('followed', True))
+        self.assertEqual(response.data['follower_count'], 1)
+
+        response = self.client.post(f'/api/users/{self.bob.pk}/follow/')
+        self.assertEqual((response.data['action'], response.data['is_following']), ('unfollowed', False))
+        self.assertEqual(response.data['follower_count'], 0)
+
+    def test_edge_lists_show_the_other_side(self):
+        self.client.post(f'/api/users/{self.bob.pk}/follow/')
+        self.assertEqual(self.page_through(f'/api/users/{self.bob.pk}/followers/', key='username'), ['alice'])
+        self.assertEqual(self.page_through(f'/api/users/{self.alice.pk}/following/', key='username'), ['bob'])
+
+
+# -------------------------------
+# SUGGESTIONS
+# -------------------------------
+
+class SuggestionTests(APICacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.me, a, b, c, self.x, self.y = [self.make_user(name) for name in ('me', 'a', 'b', 'c', 'x', 'y')]
+        for follower, followee in [(self.me, a), (self.me, b), (self.me, c),
+                                   (a, self.x), (b, self.x), (a, self.y), (a, c), (b, self.me)]:
+            follow(follower, followee.userprofile)
+        self.client.force_authenticate(self.me)
+
+    def suggested(self):
+        response = self.client.get('/api/users/suggested/')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(row['username'], row['mutual_count']) for row in response.data]
+
+    def test_candidates_are_ranked_by_mutuals_without_self_or_followed(self):
+        refresh_suggestions([self.me.pk])
+        self.assertEqual(self.suggested(), [('x', 2), ('y', 1)])
+
+    def test_followed_candidate_is_dismissed_and_not_recomputed(self):
+        refresh_suggestions([self.me.pk])
+        self.client.post(f'/api/users/{self.x.pk}/follow/')
+
+        self.assertEqual(self.suggested(), [('y', 1)])
+        self.assertTrue(UserProfile.objects.get(user=self.me).suggestions_dirty)
+        refresh_suggestions([self.me.pk])
+        self.assertEqual(self.suggested(), [('y', 1)])
+        self.assertFalse(UserProfile.objects.get(user=self.me).suggestions_dirty)
+
+
+# -------------------------------
+# HOME TIMELINE
+# -------------------------------
+
+@override_settings(HOME_TIMELINE_FANOUT_LIMIT=1)
+class HomeTimelineTests(APICacheTestCase):
+    """With a fan-out limit of 1, `celeb` (2 followers) is pulled at read time and `friend` is pushed."""
+
+    def setUp(self):
+        super().setUp()
+        self.reader, self.friend, self.celeb, self.fan, self.stranger = [
+            self.make_user(name) for name in ('reader', 'friend', 'celeb', 'fan', 'stranger')
+        ]
+        self.post(self.friend, 'f0')  # before the follow: backfilled
+
+        self.client.force_authenticate(self.fan)
+        self.toggle_follow(self.celeb)
+        self.client.force_authenticate(self.reader)
+        self.toggle_follow(self.friend)
+        self.toggle_follow(self.celeb)
+
+        for author, content in [(self.friend, 'f1'), (self.celeb, 'c1'), (self.reader, 'r1'),
+                                (self.stranger, 's1'), (self.celeb, 'c2'), (self.friend, 'f2')]:
+            self.post(author, content)
+
+    def post(self, author, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            SocialPost.objects.create(author=author, content=content)
+
+    def toggle_follow(self, user):
+        # The follower caches are invalidated on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/users/{user.pk}/follow/')
+
+    def test_pushed_and_pulled_posts_merge_newest_first(self):
+        self.assertEqual(self.page_through('/api/feed/home/?limit=2', key='content'),
+                         ['f2', 'c2', 'r1', 'c1', 'f1', 'f0'])
+        pushed = TimelineEntry.objects.filter(owner=self.reader).values_list('post__content', flat=True)
+        self.assertEqual(sorted(pushed), ['f0', 'f1', 'f2', 'r1'])
+
+    def test_unfollow_removes_the_author(self):
+        self.toggle_follow(self.friend)
+        self.toggle_follow(self.celeb)
+
+        self.assertEqual(self.page_through('/api/feed/home/?limit=2', key='content'), ['r1'])
+
+
+# -------------------------------
+# SEARCH
+# -------------------------------
+
+class SearchTests(APICacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = self.make_user('gardener')
+        self.posts = {
+            content: SocialPost.objects.create(author=self.author, content=content).pk
+            for content in ('Rocket launch tonight from the old pier', 'rocket rocket rocket',
+                            'Café opening on Main Street', 'Community garden day')
+        }
+        self.project = Project.objects.create(owner=self.author, title='Rocket garden', description='Seeds',
+                                              funding_goal=10)
+
+    def hits(self, query, kind=None):
+        params = {'q': query, **({'type': kind} if kind else {})}
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(hit['type'], hit['id']) for hit in response.data['results']]
+
+    def test_posts_are_ranked_by_relevance(self):
+        self.assertEqual(self.hits('rocket', kind='post'), [
+            ('post', self.posts['rocket rocket rocket']),
+            ('post', self.posts['Rocket launch tonight from the old pier']),
+        ])
+        self.assertEqual(self.hits('rocket', kind='project'), [('project', self.project.pk)])
+
+    def test_diacritics_and_prefixes_match(self):
+        self.assertEqual(self.hits('cafe'), [('post', self.posts['Café opening on Main Street'])])
+        self.assertEqual(set(self.hits('gard')), {
+            ('user', self.author.pk), ('post', self.posts['Community garden day']), ('project', self.project.pk),
+        })
+
+
+class SearchBackfillMigrationTests(TransactionTestCase):
+    """0011 indexes the users, posts and projects that existed before it."""
+    before = [('projects', '0010_suggested_users')]
+    after = [('projects', '0011_searchdocument')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.apps = executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_existing_rows_are_indexed(self):
+        User = self.apps.get_model('auth', 'User')
+        author = User.objects.create(username='astronomer')
+        self.apps.get_model('projects', 'UserProfile').objects.create(user=author, bio='Stargazing')
+        post = self.apps.get_model('projects', 'SocialPost').objects.create(author=author, content='Comet tonight')
+        project = self.apps.get_model('projects', 'Project').objects.create(
+            owner=author, title='Telescope', description='Mirror fund', funding_goal=10)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        SearchDocument = executor.loader.project_state(self.after).apps.get_model('projects', 'SearchDocument')
+
+        self.assertEqual(
+            set(SearchDocument.objects.values_list('kind', 'object_id', 'body')),
+            {('user', author.pk, 'astronomer Stargazing'), ('post', post.pk, 'Comet tonight'),
+             ('project', project.pk, 'Telescope Mirror fund')},
+        )
+        self.assertEqual([hit[:2] for hit in search('comet')], [('post', post.pk)])
+
+
+# -------------------------------
+# LIVE CHAT BROKER
+# -------------------------------
+
+class BrokerCheckTests(SimpleTestCase):
+    @override_settings(CHAT_BROKER='projects.realtime.InProcessBroker', WEB_CONCURRENCY=4)
+    def test_in_process_broker_with_several_workers_warns(self):
+        with self.assertLogs('projects.realtime', level='WARNING'):
+            check_broker()
+
+    @override_settings(WEB_CONCURRENCY=4)
+    def test_default_broker_serves_several_workers(self):
+        with self.assertNoLogs('projects.realtime', level='WARNING'):
+            check_broker()
+
+
+@override_settings(CHAT_BROKER_POLL_INTERVAL=0.05)
+class DatabasePollingBrokerTests(TransactionTestCase):
+    def test_one_poller_fans_out_to_every_subscriber(self):
+        a, b, c = [User.objects.create(username=name) for name in 'abc']
+        watched, _ = get_or_create_conversation(a.pk, b.pk)
+        unwatched, _ = get_or_create_conversation(a.pk, c.pk)
+        broker = DatabasePollingBroker()
+
+        async def listen():
+            async with AsyncExitStack() as stack:
+                subscriptions = [await stack.enter_async_context(broker.subscribe(watched.pk)) for _ in range(50)]
+                await sync_to_async(Message.objects.create)(conversation=unwatched, sender=c, text='elsewhere')
+                await sync_to_async(Message.objects.create)(conversation=watched, sender=b, text='hello')
+                return await asyncio.gather(*(subscription.get(5) for subscription in subscriptions))
+
+        payloads = async_to_sync(listen)()
+
+        self.assertEqual({payload['text'] for payload in payloads}, {'hello'})
+        self.assertEqual(len(payloads), 50)
+        self.assertEqual(sum(thread.name == 'chat-broker-poller' for thread in threading.enumerate()), 1)
+
+
+# -------------------------------
+# CONDITIONAL GET
+# -------------------------------
+
+class ConditionalGetTests(APICacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = self.make_user('author')
+        self.client.force_authenticate(self.author)
+
+    def test_write_in_the_same_second_is_not_a_304(self):
+        SocialPost.objects.create(author=self.author, content='first')
+        response = self.client.get('/api/social-posts/')
+        if response.has_header('Last-Modified'):
+            self.assertLessEqual(parse_http_date(response['Last-Modified']), time.time())
+        since = http_date(int(time.time()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SocialPost.objects.create(author=self.author, content='second')
+
+        response = self.client.get('/api/social-posts/', HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    @override_settings(WEB_CONCURRENCY=4)
+    def test_no_validators_when_versions_are_per_process(self):
+        SocialPost.objects.create(author=self.author, content='first')
+        SocialPost.objects.filter(author=self.author).update(created_at=timezone.now() - timedelta(minutes=1))
+
+        response = self.client.get('/api/social-posts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+        response = self.client.get('/api/social-posts/', HTTP_IF_MODIFIED_SINCE=http_date(time.time()))
+        self.assertEqual(response.status_code, 200)
+
+    @patch('projects.conditional.get_versions', return_value=['0', '0'])
+    def test_last_modified_comes_from_the_requested_rows(self, get_versions):
+        quiet, busy = [SocialPost.objects.create(author=self.author, content=name) for name in ('quiet', 'busy')]
+        Like.objects.create(post=quiet, user=self.author)
+        Like.objects.create(post=busy, user=self.author)
+        old = timezone.now().replace(year=2020, microsecond=0)
+        Like.objects.filter(post=quiet).update(created_at=old)
+        Like.objects.filter(post=busy).update(created_at=old + timedelta(days=1))
+        projects = [Project.objects.create(owner=self.author, title='p', description='d', funding_goal=10)
+                    for _ in range(2)]
+        Project.objects.filter(pk=projects[0].pk).update(created_at=old)
+
+        response = self.client.get(f'/api/social-posts/{quiet.pk}/like/')
+        self.assertEqual(response['Last-Modified'], http_date(old.timestamp()))
+        response = self.client.get(f'/api/projects/{projects[0].pk}/')
+        self.assertEqual(response['Last-Modified'], http_date(old.timestamp()))
+
+
+# -------------------------------
+# RESPONSE CACHE
+# -------------------------------
+
+class ResponseCacheTests(APICacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = self.make_user('author')
+        SocialPost.objects.create(author=self.author, content='first')
+
+    def test_write_invalidates_the_cached_list(self):
+        self.assertEqual(self.client.get('/api/social-posts/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/social-posts/')['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SocialPost.objects.create(author=self.author, content='second')
+
+        response = self.client.get('/api/social-posts/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([post['content'] for post in response.data['results']], ['second', 'first'])
+
+    @override_settings(WEB_CONCURRENCY=4)
+    def test_per_process_cache_with_several_workers_is_off(self):
+        with self.assertLogs('projects.response_cache', level='WARNING'):
+            check_response_cache()
+        for _ in range(2):
+            self.assertFalse(self.client.get('/api/social-posts/').has_header('X-Cache'))
+
+    @override_settings(WEB_CONCURRENCY=4, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'}})
+    def test_shared_cache_serves_several_workers(self):
+        with self.assertNoLogs('projects.response_cache', level='WARNING'):
+            check_response_cache()
+
+
+# -------------------------------
+# SPARSE FIELDSETS
+# -------------------------------
+
+class SparseFieldsetTests(APICacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = self.make_user('owner')
+        for title in ('one', 'two'):
+            Project.objects.create(owner=self.owner, title=title, description='d', funding_goal=10)
+        self.client.force_authenticate(self.owner)
+
+    def get_projects(self, query):
+        """(rows, SQL of the query that read the projects, query count) for /api/projects/?<query>."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/projects/?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        project_sql = [q['sql'] for q in queries if 'FROM "projects_project"' in q['sql'] and 'LIMIT 1' not in q['sql']]
+        self.assertEqual(len(project_sql), 1, project_sql)
+        return response.data, project_sql[0], len(queries)
+
+    def test_fields_limits_the_keys_and_skips_unrendered_joins(self):
+        rows, sql, _ = self.get_projects('fields=id,title')
+        self.assertEqual([set(row) for row in rows], [{'id', 'title'}] * 2)
+        self.assertNotIn('JOIN', sql)
+
+    def test_unexpanded_relation_is_its_key_without_a_join(self):
+        rows, sql, _ = self.get_projects('fields=id,owner')
+        self.assertEqual([row['owner'] for row in rows], [self.owner.pk] * 2)
+        self.assertNotIn('"auth_user"', sql)
+
+    def test_expand_renders_the_relation_from_one_joined_query(self):
+        _, _, unexpanded_count = self.get_projects('fields=id,owner')
+        rows, sql, count = self.get_projects('fields=id,owner&expand=owner')
+        self.assertEqual({row['owner']['username'] for row in rows}, {'owner'})
+        self.assertIn('"auth_user"', sql)
+        self.assertIn('"projects_userprofile"', sql)
+        self.assertEqual(count, unexpanded_count)
+
+
+# -------------------------------
+# QUERY COUNTS
+# -------------------------------
+
+class ListQueryCountTests(APICacheTestCase):
+    """
+    The public lists cost a constant number of queries, however many rows (and
+    nested users) a page has, and every route stays within its query budget.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.viewer = self.make_user('viewer')
+        self.client.force_authenticate(self.viewer)
+        self.created = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            self.created += 1
+            user = self.make_user(f'user{self.created}')
+            follow(self.viewer, user.userprofile)
+            Project.objects.create(owner=user, title='p', description='d', funding_goal=10)
+            post = SocialPost.objects.create(author=user, content='post')
+            Like.objects.create(post=post, user=self.viewer)
+            Comment.objects.create(post=post, user=user, content='comment')
+
+    def assertConstantQueries(self, url, expected):
+        for count in (5, 5):  # N rows, then 2N
+            self.add_rows(count)
+            cache.clear()
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            rows = response.data['results'] if isinstance(response.data, dict) else response.data
+            # /api/users/ also lists the viewer
+            self.assertEqual(len(rows), self.created + (url == '/api/users/'))
+
+    def test_user_list(self):
+        self.assertConstantQueries('/api/users/', 3)
+
+    def test_project_list(self):
+        self.assertConstantQueries('/api/projects/', 3)
+
+    def test_social_post_list(self):
+        self.assertConstantQueries('/api/social-posts/', 7)
+
+    def test_social_post_summary_list(self):
+        self.assertConstantQueries('/api/social-posts/?mode=summary', 7)
+
+    def test_social_post_list_through_drf_serializers(self):
+        # ?fields= takes the nested DRF serializers instead of the fast path
+        self.assertConstantQueries('/api/social-posts/?fields=id,author,likes,comments&expand=author', 5)
+
+    def test_every_route_is_within_its_budget(self):
+        self.add_rows(10)
+        post = SocialPost.objects.first()
+        conversation, _ = get_or_create_conversation(self.viewer.pk, post.author_id)
+        for i in range(10):
+            Message.objects.create(conversation=conversation, sender=post.author, text=str(i))
+        Transaction.objects.create(sender=self.viewer, receiver=post.author, project=Project.objects.first(),
+                                   amount=Decimal('1.00'))
+
+        counts = assert_query_budgets(self.client, {
+            'pk': post.author_id, 'post_id': post.pk, 'conversation_id': conversation.pk,
+        })
+
+        self.assertEqual(set(counts), {name for name, _, _ in iter_routes()} - set(DEFAULT_EXCLUDE))
+        self.assertNotIn(None, counts.values())
+
+    def test_server_timing_is_only_sent_for_buffered_responses(self):
+        self.assertIn('Server-Timing', self.client.get('/api/users/'))
+        # A streamed body's queries run after the middleware has reported
+        response = self.client.get('/api/transactions/export/')
+        self.assertTrue(response.streaming)
+        self.assertNotIn('Server-Timing', response)
+
+
+# -------------------------------
+# IDEMPOTENCY
+# -------------------------------
+
+class IdempotencyTests(APICacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sender = self.make_user('sender', balance=Decimal('100.00'))
+        self.receiver = self.make_user('receiver')
+        self.project = Project.objects.create(owner=self.receiver, title='p', description='d', funding_goal=10)
+        self.client.force_authenticate(self.sender)
+
+    def post_transfer(self, key, amount='10.00'):
+        body = {'receiver': self.receiver.pk, 'project': self.project.pk, 'amount': amount}
+        return self.client.post('/api/transactions/', body, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def balance(self):
+        return UserProfile.objects.get(user=self.sender).balance
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post_transfer('pay-1')
+        retry = self.post_transfer('pay-1')
+
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(self.balance(), Decimal('90.00'))
+
+    def test_same_key_with_a_different_body_is_rejected(self):
+        self.post_transfer('pay-1')
+        response = self.post_transfer('pay-1', amount='20.00')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_key_still_in_flight_is_a_conflict(self):
+        IdempotencyKey.objects.create(user=self.sender, key='pay-1', request_hash='pending',
+                                      expires_at=timezone.now() + timedelta(hours=1))
+        response = self.post_transfer('pay-1')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_batch_reports_each_item(self):
+        transfers = [
+            {'receiver': self.receiver.pk, 'project': self.project.pk, 'amount': '10.00'},
+            {'receiver': self.receiver.pk, 'project': self.project.pk, 'amount': '500.00'},
+            {'receiver': self.receiver.pk, 'project': self.project.pk + 1, 'amount': '1.00'},
+            {'receiver': self.receiver.pk, 'project': self.project.pk, 'amount': '5.00'},
+        ]
+        response = self.client.post('/api/transactions/batch/', {'transfers': transfers}, format='json',
+                                    HTTP_IDEMPOTENCY_KEY='batch-1')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['succeeded'], response.data['failed']), (2, 2))
+        self.assertEqual([result['ok'] for result in response.data['results']], [True, False, False, True])
+        self.assertEqual(response.data['results'][2]['error'], 'project not found')
+        self.assertEqual(self.balance(), Decimal('85.00'))
+
+        retry = self.client.post('/api/transactions/batch/', {'transfers': transfers}, format='json',
+                                 HTTP_IDEMPOTENCY_KEY='batch-1')
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Transaction.objects.count(), 2)
+
+
+# -------------------------------
+# LEDGER
+# -------------------------------
+
+@override_settings(PROJECT_FUNDING_SHARDS=0)
+class LedgerTransferTests(TransactionTestCase):
+    """Transfers commit for real here so concurrent threads contend on the same rows."""
+    users = 4
+    threads = 8
+    transfers_per_thread = 25
+    opening_balance = Decimal('100.00')
+
+    def setUp(self):
+        cache.clear()
+        self.people = []
+        for i in range(self.users):
+            user = User.objects.create(username=f'ledger{i}')
+            UserProfile.objects.update_or_create(user=user, defaults={'balance': self.opening_balance})
+            self.people.append(user)
+        self.project = Project.objects.create(owner=self.people[0], title='p', description='d', funding_goal=10)
+
+    def balances(self):
+        return dict(UserProfile.objects.filter(user__in=self.people).values_list('user_id', 'balance'))
+
+    def test_insufficient_funds_is_rejected_without_side_effects(self):
+        sender, receiver = self.people[:2]
+        with self.assertRaises(InsufficientFunds):
+            transfer(sender, receiver, self.project, self.opening_balance + Decimal('0.01'))
+
+        self.assertEqual(set(self.balances().values()), {self.opening_balance})
+        self.assertFalse(Transaction.objects.exists())
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.current_funding, 0)
+
+    def test_parallel_transfers_conserve_the_total_balance(self):
+        outcomes = {'ok': 0, 'insufficient': 0}
+        lock = threading.Lock()
+        errors = []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                for _ in range(self.transfers_per_thread):
+                    sender, receiver = rng.sample(self.people, 2)
+                    amount = Decimal(rng.randint(1, 4000)) / 100
+                    outcome = self.transfer_with_retry(sender, receiver, amount)
+                    with lock:
+                        outcomes[outcome] += 1
+            except Exception as exc:  # surfaced in the main thread
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(outcomes['ok'] + outcomes['insufficient'], self.threads * self.transfers_per_thread)
+        self.assertGreater(outcomes['ok'], 0)
+
+        balances = self.balances()
+        self.assertEqual(sum(balances.values()), self.opening_balance * self.users)
+        self.assertTrue(all(balance >= 0 for balance in balances.values()), balances)
+
+        # Every balance is explained by the committed Transaction rows
+        self.assertEqual(Transaction.objects.count(), outcomes['ok'])
+        for user in self.people:
+            sent = Transaction.objects.filter(sender=user).aggregate(total=Sum('amount'))['total'] or 0
+            received = Transaction.objects.filter(receiver=user).aggregate(total=Sum('amount'))['total'] or 0
+            self.assertEqual(balances[user.pk], self.opening_balance - sent + received)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.current_funding, Transaction.objects.aggregate(total=Sum('amount'))['total'])
+
+    def transfer_with_retry(self, sender, receiver, amount):
+        # SQLite locks the whole database instead of rows; retry there, as a client would
+        for attempt in range(50):
+            try:
+                transfer(sender, receiver, self.project, amount)
+                return 'ok'
+            except InsufficientFunds:
+                return 'insufficient'
+            except OperationalError:
+                if connection.vendor != 'sqlite':
+                    raise
+                time.sleep(0.01 * (attempt + 1))
+        raise AssertionError("transfer kept failing on database locks")
+
+
+@override_settings(PROJECT_FUNDING_SHARDS=4)
+class FundingShardTests(TestCase):
+    def test_rollup_moves_the_exact_total_and_zeroes_the_shards(self):
+        owner = User.objects.create(username='owner')
+        project = Project.objects.create(owner=owner, title='p', description='d', funding_goal=10)
+        rng = random.Random(7)
+        amounts = [Decimal(rng.randint(1, 99999)) / 100 for _ in range(200)]
+        for amount in amounts:
+            credit_project(project.pk, amount)
+
+        project.refresh_from_db()
+        self.assertEqual(project.current_funding, 0)
+        self.assertEqual(ProjectFundingShard.objects.filter(project=project).count(), 4)
+
+        self.assertEqual(rollup_project_funding(), 1)
+        project.refresh_from_db()
+        self.assertEqual(project.current_funding, sum(amounts, Decimal('0')))
+        self.assertEqual(set(ProjectFundingShard.objects.values_list('amount', flat=True)), {Decimal('0')})
+        self.assertEqual(rollup_project_funding(), 0)
@@ -0,0 +1,93 @@
+# projects/timeline.py
+"""
+Materialized home timelines (fan-out-on-write).
+
+When a post is created it is copied into the TimelineEntry rows of every
+follower, so reading /api/feed/home/ is one indexed range scan per page.
+Authors with more than HOME_TIMELINE_FANOUT_LIMIT followers are not fanned
+out; their posts are pulled at read time and merged in (hybrid push/pull),
+which keeps a single celebrity post from writing millions of rows.
+"""
+from django.conf import settings
+
+from .graph import get_follower_ids, get_following_ids
+from .models import SocialPost, TimelineEntry, UserProfile
+
+BULK_BATCH_SIZE = 1000
+
+
+def get_pull_author_ids(user_id):
+    """Authors followed by `user_id` whose posts are pulled instead of pushed."""
+    return set(
+        UserProfile.objects.filter(
+            followers__id=user_id,
+            follower_count__gt=settings.HOME_TIMELINE_FANOUT_LIMIT,
+        ).values_list('user_id', flat=True)
+    )
+
+
+def is_pull_author(user_id):
+    return UserProfile.objects.filter(
+        user_id=user_id,
+        follower_count__gt=settings.HOME_TIMELINE_FANOUT_LIMIT,
+    ).exists()
+
+
+def _entries_for(post_id, author_id, created_at, owner_ids):
+    return [
+        TimelineEntry(owner_id=owner_id, post_id=post_id, author_id=author_id, created_at=created_at)
+        for owner_id in owner_ids
+    ]
+
+
+def fan_out_post(post):
+    """Push a new post into its author's and (unless too many) followers' timelines."""
+    owner_ids = {post.author_id}
+    if not is_pull_author(post.author_id):
+        owner_ids |= get_follower_ids(post.author_id)
+    TimelineEntry.objects.bulk_create(
+        _entries_for(post.id, post.author_id, post.created_at, owner_ids),
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def add_author_to_timeline(owner_id, author_id):
+    """Backfill an author's recent posts after `owner_id` starts following them."""
+    if is_pull_author(author_id):
+        return
+    recent = SocialPost.objects.filter(author_id=author_id).order_by('-created_at', '-id')
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(owner_id=owner_id, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, created_at in recent.values_list('id', 'created_at')[:settings.HOME_TIMELINE_MAX_ENTRIES]
+        ],
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def remove_author_from_timeline(owner_id, author_id):
+    """Drop an author's posts after `owner_id` unfollows them."""
+    TimelineEntry.objects.filter(owner_id=owner_id, author_id=author_id).delete()
+
+
+def rebuild_timeline(owner_id):
+    """
+    Recreate one user's timeline from scratch: their own posts plus the
+    newest HOME_TIMELINE_MAX_ENTRIES posts of every pushed author they follow.
+    Returns the number of entries written.
+    """
+    author_ids = (get_following_ids(owner_id) - get_pull_author_ids(owner_id)) | {owner_id}
+    recent = (
+        SocialPost.objects.filter(author_id__in=author_ids)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'author_id', 'created_at')[:settings.HOME_TIMELINE_MAX_ENTRIES]
+    )
+    entries = [
+        TimelineEntry(owner_id=owner_id, post_id=post_id, author_id=author_id, created_at=created_at)
+        for post_id, author_id, created_at in recent
+    ]
+    TimelineEntry.objects.filter(owner_id=owner_id).delete()
+    TimelineEntry.objects.bulk_create(entries, batch_size=BULK_BATCH_SIZE)
+    return len(entries)
@@ -1,12 +1,24 @@
 # projects/urls.py
+from django.conf import settings
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import (
     RegisterView, UserListView, UserDetailView, UserDetailByIdView, ChangePasswordView,
-    ProjectListCreateView, ProjectDetailView, TransactionCreateView,
-    SocialPostListCreateView, LikeCreateView, CommentCreateView,
-    ConversationListCreateView, MessageListCreateView, FollowToggleView
+    ProjectListCreateView, ProjectDetailView, TransactionListCreateView, TransactionExportView, TransactionBatchView,
+    SocialPostListCreateView, HomeFeedView, LikeListCreateView, CommentListCreateView,
+    ConversationListCreateView, ConversationReadView, MessageListCreateView, FollowToggleView,
+    FollowerListView, FollowingListView, SuggestedUserListView, SearchView, ResponseCacheStatsView
 )
+from .async_views import async_get
+from .streams import conversation_events
+
+
+def read_view(view_class):
+    """The async GET path for `view_class` when ASYNC_READ_VIEWS is on, else the sync DRF view."""
+    if settings.ASYNC_READ_VIEWS:
+        return async_get(view_class)
+    return view_class.as_view()
+
 
 router = DefaultRouter()
 
@@ -17,29 +29,48 @@ urlpatterns = [
     path("auth/register/", RegisterView.as_view(), name="register"),
     # This route is specifically for the currently logged-in user's editable profile
     path("auth/user/", UserDetailView.as_view(), name="user-detail"), # ✅ Renamed to /auth/user/ to match frontend call in Profile.jsx
-    path("users/", UserListView.as_view(), name="user-list"),
+    path("users/", read_view(UserListView), name="user-list"),
+    path("users/suggested/", SuggestedUserListView.as_view(), name="user-suggested"),
     path("users/<int:pk>/", UserDetailByIdView.as_view(), name="user-detail-by-id"),
     path("users/<int:pk>/follow/", FollowToggleView.as_view(), name="follow-toggle"), 
+    path("users/<int:pk>/followers/", FollowerListView.as_view(), name="user-followers"),
+    path("users/<int:pk>/following/", FollowingListView.as_view(), name="user-following"),
     path("users/change-password/", ChangePasswordView.as_view(), name="change-password"),
 
     # =============================
     # PROJECTS & TRANSACTIONS
     # =============================
-    path("projects/", ProjectListCreateView.as_view(), name="projects"),
+    path("projects/", read_view(ProjectListCreateView), name="projects"),
     path("projects/<int:pk>/", ProjectDetailView.as_view(), name="project-detail"),
-    path("transactions/", TransactionCreateView.as_view(), name="transactions"),
+    path("transactions/", TransactionListCreateView.as_view(), name="transactions"),
+    path("transactions/export/", TransactionExportView.as_view(), name="transactions-export"),
+    path("transactions/batch/", TransactionBatchView.as_view(), name="transactions-batch"),
 
     # =============================
     # SOCIAL POSTS & ENGAGEMENT
     # =============================
-    path("social-posts/", SocialPostListCreateView.as_view(), name="social-posts"),
-    path("social-posts/<int:post_id>/like/", LikeCreateView.as_view(), name="like-post"),
-    path("social-posts/<int:post_id>/comment/", CommentCreateView.as_view(), name="add-comment"),
+    path("social-posts/", read_view(SocialPostListCreateView), name="social-posts"),
+    path("feed/home/", HomeFeedView.as_view(), name="home-feed"),
+    # GET pages through likers/comments (cursor-paginated), POST adds one
+    path("social-posts/<int:post_id>/like/", LikeListCreateView.as_view(), name="like-post"),
+    path("social-posts/<int:post_id>/comment/", CommentListCreateView.as_view(), name="add-comment"),
+
+    # =============================
+    # RESPONSE CACHE
+    # =============================
+    path("cache/stats/", ResponseCacheStatsView.as_view(), name="response-cache-stats"),
+
+    # =============================
+    # SEARCH
+    # =============================
+    path("search/", SearchView.as_view(), name="search"),
 
     # =============================
     # MESSAGING 
     # =============================
     # ✅ FIX: Match URL endpoint to the MessageListCreateView logic from views.py
     path("conversations/", ConversationListCreateView.as_view(), name="conversations"),
-    path("conversations/<int:conversation_id>/messages/", MessageListCreateView.as_view(), name="messages"),
+    path("conversations/<int:conversation_id>/messages/", read_view(MessageListCreateView), name="messages"),
+    path("conversations/<int:conversation_id>/events/", conversation_events, name="conversation-events"),
+    path("conversations/<int:conversation_id>/read/", ConversationReadView.as_view(), name="conversation-read"),
 ]
\ No newline at end of file
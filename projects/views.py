@@ -1,30 +1,94 @@
 # projects/views.py
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.db import transaction, models
+from django.db.models import Exists, F, OuterRef, Prefetch, Value
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound, PermissionDenied
 # ✅ ADDED: MultiPartParser to handle file uploads (profile_image)
 from rest_framework.parsers import MultiPartParser, FormParser 
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
+import asyncio
+import csv
+import itertools
+import json
 import logging
+import time
+from operator import attrgetter
 
 # ✅ Add logging
 logger = logging.getLogger(__name__)
 
 from .models import (
     Project, Transaction, UserProfile,
-    SocialPost, Conversation, Message
+    SocialPost, Like, Comment, TimelineEntry, SuggestedUser, SearchDocument,
+    Conversation, ConversationParticipant, Message
 )
+from .graph import Follow, follow, get_following_ids, unfollow
+from .archive import archived_messages
+from .async_views import AsyncListMixin
+from .conditional import ConditionalGetMixin
+from .fast_serializers import PostRowSerializer
+from .idempotency import IdempotentCreateMixin
+from .inbox import get_or_create_conversation, is_participant, mark_read
+from .ledger import LedgerError, parse_amount, transfer, transfer_batch
+from .pagination import KeysetPagination
+from .realtime import publish_message
+from .response_cache import ResponseCacheMixin, get_stats
+from .search import search
+from .suggestions import dismiss_suggestion, mark_suggestions_dirty
+from .timeline import add_author_to_timeline, get_pull_author_ids, remove_author_from_timeline
 from .serializers import (
     UserSerializer, ProjectSerializer, TransactionSerializer,
-    SocialPostSerializer, LikeSerializer,
-    CommentSerializer, ConversationSerializer, MessageSerializer, PublicUserSerializer
+    SocialPostSerializer, SocialPostSummarySerializer, LikeSerializer,
+    CommentSerializer, ConversationSerializer, MessageSerializer, PublicUserSerializer,
+    SuggestedUserSerializer, sparse_params
 )
 
 
+# -------------------------------
+# SHARED VIEW HELPERS
+# -------------------------------
+
+class FollowingContextMixin:
+    """
+    Load the requesting user's follow set once per request so that every
+    PublicUserSerializer on the page (owners, authors, likers, commenters)
+    answers `is_following` from memory instead of one query per user.
+    """
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        user = self.request.user
+        # Under ?fields= the page may render no user at all; PublicUserSerializer
+        # then loads the set on first use instead
+        if user.is_authenticated and sparse_params(self.request)[0] is None:
+            context['following_ids'] = get_following_ids(user.id)
+        return context
+
+
+class SparseFieldsetMixin:
+    """
+    Join only what the serializer will render: with ?fields= / ?expand=
+    (serializers.SparseFieldsMixin) unrequested relations are not selected.
+    """
+
+    def select_rendered_relations(self, queryset, serializer_class=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        paths = serializer_class.related_paths(self.request)
+        return queryset.select_related(*paths) if paths else queryset
+
+    def renders_field(self, name):
+        return self.get_serializer_class().renders_field(self.request, name)
+
+
 # -------------------------------
 # AUTH / USER MANAGEMENT
 # -------------------------------
@@ -57,17 +121,20 @@ class RegisterView(generics.CreateAPIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(ConditionalGetMixin, ResponseCacheMixin, AsyncListMixin, SparseFieldsetMixin, FollowingContextMixin,
+                   generics.ListAPIView):
     """
     Public user list endpoint used by the frontend Explore page.
     """
     # ✅ FIX: Use PublicUserSerializer for public lists
     serializer_class = PublicUserSerializer
     permission_classes = [permissions.AllowAny]
+    cache_groups = ('user',)
+    last_modified_field = 'date_joined'
     
     def get_queryset(self):
-        # We need to select_related('userprofile') for the serializer fields (bio, profile_image)
-        return User.objects.all().select_related('userprofile')
+        # userprofile is joined only if a profile field (bio, profile_image, counts) is rendered
+        return self.select_rendered_relations(User.objects.all())
 
     def list(self, request, *args, **kwargs):
         try:
@@ -77,6 +144,36 @@ class UserListView(generics.ListAPIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class SuggestedUserListView(FollowingContextMixin, generics.ListAPIView):
+    """
+    Friends-of-friends suggestions for the current user, best first.
+    Endpoint: /users/suggested/?limit=20
+    Reads the precomputed SuggestedUser rows (manage.py refresh_suggestions).
+    """
+    serializer_class = SuggestedUserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+    max_limit = 50
+
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+        return SuggestedUser.objects.filter(
+            user=self.request.user
+        ).select_related('candidate__userprofile').order_by('-mutual_count', 'candidate_id')[:limit]
+
+    def list(self, request, *args, **kwargs):
+        candidates = []
+        for suggestion in self.get_queryset():
+            suggestion.candidate.mutual_count = suggestion.mutual_count
+            candidates.append(suggestion.candidate)
+        serializer = self.get_serializer(candidates, many=True)
+        return Response(serializer.data)
+
+
 class UserDetailView(APIView):
     """Get or update the currently authenticated user's details."""
     permission_classes = [permissions.IsAuthenticated]
@@ -108,12 +205,14 @@ class UserDetailView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class UserDetailByIdView(generics.RetrieveAPIView):
+class UserDetailByIdView(ConditionalGetMixin, generics.RetrieveAPIView):
     """Get a single user's details by ID"""
     queryset = User.objects.all().select_related('userprofile')
     serializer_class = PublicUserSerializer 
     permission_classes = [permissions.AllowAny]
     lookup_field = 'pk'
+    cache_groups = ('user',)
+    last_modified_field = 'date_joined'
 
     def retrieve(self, request, *args, **kwargs):
         try:
@@ -180,29 +279,35 @@ class FollowToggleView(APIView):
             # 3. Get the target user's profile to access the 'followers' M2M field
             target_profile = target_user.userprofile
 
-            # 4. Check the current following status
-            is_following = target_profile.followers.filter(id=request.user.id).exists()
-
-            if is_following:
-                # 5. UNFOLLOW action: Remove the current user from the target's followers list
-                target_profile.followers.remove(request.user)
+            # 4. Toggle: drop the edge if it exists, otherwise add it.
+            # graph.follow/unfollow keep follower_count/following_count and the
+            # cached adjacency sets in sync with the edge table.
+            if unfollow(request.user, target_profile):
+                # 5. UNFOLLOW action: the current user was removed from the target's followers
+                remove_author_from_timeline(request.user.id, target_user.id)
+                mark_suggestions_dirty(request.user.id)
+                is_following = False
                 message = f"Successfully unfollowed @{target_user.username}"
                 action = "unfollowed"
             else:
                 # 5. FOLLOW action: Add the current user to the target's followers list
-                target_profile.followers.add(request.user)
+                follow(request.user, target_profile)
+                add_author_to_timeline(request.user.id, target_user.id)
+                dismiss_suggestion(request.user.id, target_user.id)
+                mark_suggestions_dirty(request.user.id)
+                is_following = True
                 message = f"Successfully followed @{target_user.username}"
                 action = "followed"
 
-            # NOTE: M2M relationships (like followers.add/remove) automatically save the change, 
-            # so target_profile.save() is typically NOT required here.
+            target_profile.refresh_from_db(fields=['follower_count'])
 
             # 6. Return the updated status and a success message
             return Response(
                 {
                     "message": message, 
-                    "is_following": not is_following, # The new status
-                    "action": action
+                    "is_following": is_following, # The new status
+                    "action": action,
+                    "follower_count": target_profile.follower_count,
                 }, 
                 status=status.HTTP_200_OK
             )
@@ -213,37 +318,128 @@ class FollowToggleView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class FollowEdgeListMixin(FollowingContextMixin):
+    """
+    Page through one side of a user's follow edges, most recent edge first.
+    Pages are keyed on the edge id; the users on the page are serialized
+    with PublicUserSerializer.
+    """
+    serializer_class = PublicUserSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetPagination
+    cursor_fields = ('id',)
+    # Path from a Follow edge to the user listed for it (dotted for related fields)
+    edge_user_field = 'user'
+
+    def get_cursor_fields(self):
+        return self.cursor_fields
+
+    def list(self, request, *args, **kwargs):
+        get_object_or_404(User.objects.only('id'), pk=self.kwargs['pk'])
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer([attrgetter(self.edge_user_field)(edge) for edge in page], many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class FollowerListView(FollowEdgeListMixin, generics.ListAPIView):
+    """Users following <pk>. Endpoint: /users/<pk>/followers/?cursor=&limit="""
+
+    def get_queryset(self):
+        return Follow.objects.filter(userprofile__user_id=self.kwargs['pk']).select_related('user__userprofile')
+
+
+class FollowingListView(FollowEdgeListMixin, generics.ListAPIView):
+    """Users <pk> follows. Endpoint: /users/<pk>/following/?cursor=&limit="""
+    edge_user_field = 'userprofile.user'
+
+    def get_queryset(self):
+        return Follow.objects.filter(user_id=self.kwargs['pk']).select_related('userprofile__user')
+
+
 # -------------------------------
 # PROJECTS + TRANSACTIONS
 # -------------------------------
 
-class ProjectListCreateView(generics.ListCreateAPIView):
+class ProjectListCreateView(ConditionalGetMixin, ResponseCacheMixin, AsyncListMixin, SparseFieldsetMixin,
+                            FollowingContextMixin, generics.ListCreateAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_groups = ('project', 'user')
 
     def get_queryset(self):
-        queryset = Project.objects.all().select_related('owner__userprofile').order_by("-created_at")
+        queryset = self.select_rendered_relations(Project.objects.all()).order_by("-created_at")
         owner_id = self.request.query_params.get('owner', None)
         if owner_id:
             queryset = queryset.filter(owner_id=owner_id)
+        # ?sort=trending reads the precomputed ProjectScore (manage.py recompute_scores)
+        if self.request.query_params.get('sort') == 'trending':
+            queryset = queryset.order_by(F('score__score').desc(nulls_last=True), '-created_at')
         return queryset
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
-class ProjectDetailView(generics.RetrieveAPIView):
+class ProjectDetailView(ConditionalGetMixin, ResponseCacheMixin, generics.RetrieveAPIView):
     queryset = Project.objects.all().select_related('owner__userprofile')
     serializer_class = ProjectSerializer
     permission_classes = [permissions.AllowAny]
+    cache_groups = ('project', 'user')
+
+
+class TransactionStatementMixin:
+    """
+    Resolve whose statement is being read: ?user=me (the default), or any
+    user id for staff. Everyone else may only read their own history.
+    """
 
+    def get_statement_user_id(self):
+        requested = self.request.query_params.get('user', 'me')
+        if requested == 'me':
+            return self.request.user.id
+        if not self.request.user.is_staff:
+            raise PermissionDenied("You can only view your own transactions.")
+        try:
+            return int(requested)
+        except ValueError:
+            raise NotFound("Unknown user")
 
-# In projects/views.py - Update TransactionCreateView
 
-class TransactionCreateView(generics.CreateAPIView):
+class TransactionListCreateView(TransactionStatementMixin, IdempotentCreateMixin, SparseFieldsetMixin,
+                                generics.ListCreateAPIView):
+    """
+    GET:  /transactions/?user=me&cursor=&limit=  -> my sent + received transactions, newest first
+    POST: /transactions/                          -> transfer funds (Idempotency-Key aware)
+    """
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_fields = ('timestamp', 'id')
+
+    def list(self, request, *args, **kwargs):
+        # Sent and received rows are read as two keyset range scans (one per
+        # index) and merged, rather than one OR query the database must sort.
+        user_id = self.get_statement_user_id()
+        paginator = self.paginator
+        paginator.fields = self.cursor_fields
+        paginator.limit = limit = paginator.get_limit(request)
+        token = request.query_params.get(paginator.cursor_query_param)
+
+        rows = []
+        for side in ('sender_id', 'receiver_id'):
+            rows += paginator.apply_cursor(
+                Transaction.objects.filter(**{side: user_id}), token
+            ).values(*self.cursor_fields)[:limit + 1]
+        rows = list({row['id']: row for row in rows}.values())
+        rows.sort(key=lambda row: (row['timestamp'], row['id']), reverse=True)
+
+        page = paginator.build_page(rows[:limit + 1])
+        transactions = self.select_rendered_relations(Transaction.objects.all()).in_bulk(
+            [row['id'] for row in page]
+        )
+        serializer = self.get_serializer([transactions[row['id']] for row in page], many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def create(self, request, *args, **kwargs):
         """Custom create to handle transaction logic properly"""
@@ -263,44 +459,24 @@ class TransactionCreateView(generics.CreateAPIView):
             try:
                 receiver = User.objects.get(id=receiver_id)
                 project = Project.objects.get(id=project_id)
-                amount = float(amount)
-            except (User.DoesNotExist, Project.DoesNotExist, ValueError) as e:
+                amount = parse_amount(amount)
+            except (User.DoesNotExist, Project.DoesNotExist, ValueError, LedgerError) as e:
                 return Response(
                     {"error": str(e)},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            sender = request.user
-
-            # Perform transaction
-            with transaction.atomic():
-                sender_profile = sender.userprofile
-                receiver_profile = receiver.userprofile
-
-                if sender_profile.balance < amount:
-                    return Response(
-                        {"error": "Insufficient balance."},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                sender_profile.balance -= amount
-                receiver_profile.balance += amount
-                project.current_funding += amount
-
-                sender_profile.save()
-                receiver_profile.save()
-                project.save()
-
-                # Create transaction record
-                trans = Transaction.objects.create(
-                    sender=sender,
-                    receiver=receiver,
-                    project=project,
-                    amount=amount
+            # Perform transaction (projects/ledger.py: atomic, F()-based, deterministic lock order)
+            try:
+                trans = transfer(request.user, receiver, project, amount)
+            except LedgerError as e:
+                return Response(
+                    {"error": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
 
-                serializer = self.get_serializer(trans)
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
+            serializer = self.get_serializer(trans)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         except Exception as e:
             logger.error(f"❌ Transaction error: {str(e)}")
@@ -309,20 +485,235 @@ class TransactionCreateView(generics.CreateAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class TransactionExportView(TransactionStatementMixin, APIView):
+    """
+    Stream a user's full transaction history, oldest first.
+    Endpoint: /transactions/export/?user=me&output=csv|ndjson
+
+    Rows are read with a chunked iterator and written as they are produced,
+    so memory use stays flat however long the history is.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    columns = ('id', 'timestamp', 'direction', 'sender', 'receiver', 'project_id', 'project_title', 'amount')
+    chunk_size = 2000
+
+    def get(self, request):
+        output = request.query_params.get('output', 'csv')
+        if output not in ('csv', 'ndjson'):
+            return Response({"error": "output must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+
+        user_id = self.get_statement_user_id()
+        rows = (
+            Transaction.objects.filter(models.Q(sender_id=user_id) | models.Q(receiver_id=user_id))
+            .order_by('timestamp', 'id')
+            .values_list('id', 'timestamp', 'sender_id', 'sender__username',
+                         'receiver__username', 'project_id', 'project__title', 'amount')
+            .iterator(chunk_size=self.chunk_size)
+        )
+        records = (
+            (pk, timestamp.isoformat(), 'sent' if sender_id == user_id else 'received',
+             sender, receiver, project_id, project_title, str(amount))
+            for pk, timestamp, sender_id, sender, receiver, project_id, project_title, amount in rows
+        )
+
+        if output == 'csv':
+            writer = csv.writer(_EchoBuffer())
+            lines = itertools.chain([writer.writerow(self.columns)], (writer.writerow(r) for r in records))
+            content_type = 'text/csv'
+        else:
+            lines = (json.dumps(dict(zip(self.columns, r))) + '\n' for r in records)
+            content_type = 'application/x-ndjson'
+
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="transactions-{user_id}.{output}"'
+        return response
+
+
+class _EchoBuffer:
+    """File-like object for csv.writer that hands each row back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+class TransactionBatchView(IdempotentCreateMixin, generics.CreateAPIView):
+    """
+    Apply many transfers from the current user in one database transaction.
+    Endpoint: /transactions/batch/
+    Body: {"transfers": [{"receiver": id, "project": id, "amount": "10.00"}, ...]}
+    Returns one result per item: {"index", "ok", "transaction" | "error"}.
+    Honours the Idempotency-Key header like /transactions/.
+    """
+    serializer_class = TransactionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        transfers = request.data.get('transfers') if hasattr(request.data, 'get') else None
+        if not isinstance(transfers, list) or not transfers:
+            return Response({"error": "transfers must be a non-empty list"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(transfers) > settings.TRANSACTION_BATCH_MAX_ITEMS:
+            return Response({"error": f"at most {settings.TRANSACTION_BATCH_MAX_ITEMS} transfers per batch"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Validate every item up front; objects are loaded in two bulk queries
+            parsed = [self._parse_item(item) for item in transfers]
+            receivers = User.objects.in_bulk({p[0] for p in parsed if isinstance(p, tuple)})
+            projects = Project.objects.in_bulk({p[1] for p in parsed if isinstance(p, tuple)})
+
+            results = [None] * len(transfers)
+            valid_indexes, items = [], []
+            for index, item in enumerate(parsed):
+                if not isinstance(item, tuple):
+                    results[index] = {"index": index, "ok": False, "error": item}
+                elif item[0] not in receivers:
+                    results[index] = {"index": index, "ok": False, "error": "receiver not found"}
+                elif item[1] not in projects:
+                    results[index] = {"index": index, "ok": False, "error": "project not found"}
+                else:
+                    valid_indexes.append(index)
+                    items.append((receivers[item[0]], projects[item[1]], item[2]))
+
+            outcomes = transfer_batch(request.user, items) if items else []
+            for index, outcome in zip(valid_indexes, outcomes):
+                if isinstance(outcome, LedgerError):
+                    results[index] = {"index": index, "ok": False, "error": str(outcome)}
+                else:
+                    results[index] = {"index": index, "ok": True,
+                                      "transaction": self.get_serializer(outcome).data}
+
+            succeeded = sum(1 for result in results if result["ok"])
+            return Response(
+                {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results},
+                status=status.HTTP_201_CREATED if succeeded else status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            logger.error(f"❌ Transaction batch error: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _parse_item(self, item):
+        """Return (receiver_id, project_id, amount) or an error message."""
+        if not isinstance(item, dict) or not all(item.get(k) for k in ('receiver', 'project', 'amount')):
+            return "receiver, project, and amount are required"
+        try:
+            return int(item['receiver']), int(item['project']), parse_amount(item['amount'])
+        except (TypeError, ValueError):
+            return "receiver and project must be ids"
+        except LedgerError as e:
+            return str(e)
+
+
 # -------------------------------
 # SOCIAL POSTS + ENGAGEMENT
 # -------------------------------
 
-class SocialPostListCreateView(generics.ListCreateAPIView):
-    serializer_class = SocialPostSerializer
+class SocialPostFeedMixin(SparseFieldsetMixin, FollowingContextMixin):
+    """
+    Shared shape of every post feed: full or ?mode=summary representation,
+    with the joins/prefetches each representation needs.
+    """
+    pagination_class = KeysetPagination
+    comment_preview_count = 3
+    # Serialize GET pages with fast_serializers.PostRowSerializer instead of DRF
+    fast_serialization = False
+
+    def is_summary_mode(self):
+        return self.request.query_params.get('mode') == 'summary'
+
+    def use_fast_serialization(self):
+        # PostRowSerializer always builds the full representation
+        return self.fast_serialization and self.request.method == 'GET' and sparse_params(self.request)[0] is None
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET' and self.is_summary_mode():
+            return SocialPostSummarySerializer
+        return SocialPostSerializer
+
+    def serialize_posts(self, post_ids):
+        """Fast-path page body for `post_ids`, in order."""
+        serializer = PostRowSerializer(self.get_serializer_context(), summary=self.is_summary_mode())
+        serializer.comment_preview_count = self.comment_preview_count
+        return serializer.serialize(post_ids)
+
+    def decorate_feed_queryset(self, queryset):
+        if self.use_fast_serialization():
+            # Only post ids (and the cursor key) are read; PostRowSerializer loads the rest
+            return queryset
+        queryset = self.select_rendered_relations(queryset)
+        if self.is_summary_mode():
+            if self.renders_field('liked_by_me'):
+                user = self.request.user
+                if user.is_authenticated:
+                    liked = Exists(Like.objects.filter(post=OuterRef('pk'), user=user))
+                else:
+                    liked = Value(False)
+                queryset = queryset.annotate(liked_by_me=liked)
+            if self.renders_field('comment_previews'):
+                previews = Comment.objects.select_related('user__userprofile').order_by('-created_at', '-id')
+                queryset = queryset.prefetch_related(
+                    Prefetch('comments', queryset=previews[:self.comment_preview_count], to_attr='comment_previews')
+                )
+            return queryset
+        if self.renders_field('likes'):
+            queryset = queryset.prefetch_related(
+                Prefetch('likes', queryset=Like.objects.select_related('user__userprofile'))
+            )
+        if self.renders_field('comments'):
+            queryset = queryset.prefetch_related(
+                Prefetch('comments', queryset=Comment.objects.select_related('user__userprofile'))
+            )
+        return queryset
+
+
+class SocialPostListCreateView(ConditionalGetMixin, ResponseCacheMixin, AsyncListMixin, SocialPostFeedMixin, generics.ListCreateAPIView):
+    """
+    Social feed. Cursor-paginated on (created_at, id):
+    /social-posts/?cursor=<next>&limit=20
+
+    ?mode=summary returns like/comment counters, `liked_by_me` and up to
+    3 comment previews instead of the full likes/comments lists.
+
+    ?sort=hot orders by the precomputed PostScore (manage.py recompute_scores)
+    and paginates on (score, id) instead.
+    """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_groups = ('post', 'user')
+    fast_serialization = True
+
+    def is_hot_sort(self):
+        return self.request.query_params.get('sort') == 'hot'
+
+    def get_cursor_fields(self):
+        if self.is_hot_sort():
+            return ('hot_score', 'id')
+        return ('created_at', 'id')
 
     def get_queryset(self):
-        queryset = SocialPost.objects.all().select_related('author__userprofile').order_by("-created_at")
+        # Ordering is applied by KeysetPagination on get_cursor_fields()
+        queryset = SocialPost.objects.all()
         author_id = self.request.query_params.get('author', None)
         if author_id:
             queryset = queryset.filter(author_id=author_id)
-        return queryset
+        if self.is_hot_sort():
+            # Inner join on the score table so the (-score, -post) index drives the scan
+            queryset = queryset.filter(score__isnull=False).annotate(hot_score=F('score__score'))
+        return self.decorate_feed_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_serialization():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).values(*self.get_cursor_fields())
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.serialize_posts([row['id'] for row in page]))
+
+    async def alist(self, request, *args, **kwargs):
+        if not self.use_fast_serialization():
+            return await super().alist(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).values(*self.get_cursor_fields())
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        data = await sync_to_async(self.serialize_posts)([row['id'] for row in page])
+        return self.get_paginated_response(data)
 
     def perform_create(self, serializer):
         try:
@@ -332,71 +723,391 @@ class SocialPostListCreateView(generics.ListCreateAPIView):
             raise
 
 
-class LikeCreateView(generics.CreateAPIView):
-    serializer_class = LikeSerializer
+class HomeFeedView(SocialPostFeedMixin, generics.ListAPIView):
+    """
+    Posts from the people I follow (and my own), newest first:
+    /feed/home/?cursor=<next>&limit=20  (supports ?mode=summary)
+
+    Reads the materialized TimelineEntry rows (one indexed range scan) and
+    merges in posts from followed authors too large to fan out on write.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    cursor_fields = ('created_at', 'post_id')
+    fast_serialization = True
+
+    def get_queryset(self):
+        return self.decorate_feed_queryset(SocialPost.objects.all())
+
+    def list(self, request, *args, **kwargs):
+        paginator = self.paginator
+        paginator.fields = self.cursor_fields
+        paginator.limit = limit = paginator.get_limit(request)
+        token = request.query_params.get(paginator.cursor_query_param)
+
+        pushed = paginator.apply_cursor(
+            TimelineEntry.objects.filter(owner=request.user), token
+        ).values(*self.cursor_fields)[:limit + 1]
+        rows = list(pushed)
+
+        pull_author_ids = get_pull_author_ids(request.user.id)
+        if pull_author_ids:
+            pulled = paginator.apply_cursor(
+                SocialPost.objects.filter(author_id__in=pull_author_ids).annotate(post_id=F('id')), token
+            ).values(*self.cursor_fields)[:limit + 1]
+            seen = {row['post_id'] for row in rows}
+            rows += [row for row in pulled if row['post_id'] not in seen]
+            rows.sort(key=lambda row: (row['created_at'], row['post_id']), reverse=True)
+
+        page = paginator.build_page(rows[:limit + 1])
+        if self.use_fast_serialization():
+            return paginator.get_paginated_response(self.serialize_posts([row['post_id'] for row in page]))
+        posts = self.get_queryset().in_bulk([row['post_id'] for row in page])
+        serializer = self.get_serializer(
+            [posts[row['post_id']] for row in page if row['post_id'] in posts], many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+
+class PostEngagementMixin(ConditionalGetMixin, SparseFieldsetMixin, FollowingContextMixin):
+    """
+    Shared behaviour for the per-post likes/comments sub-resources:
+    GET pages through the rows for `post_id` newest first, POST adds one.
+    """
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    model = None
+    cache_groups = ('post', 'user')
+
+    def get_queryset(self):
+        # Ordering is applied by KeysetPagination: (-created_at, -id)
+        return self.select_rendered_relations(self.model.objects.filter(post_id=self.kwargs['post_id']))
+
+    def list(self, request, *args, **kwargs):
+        get_object_or_404(SocialPost.objects.only('id'), pk=self.kwargs['post_id'])
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        post = get_object_or_404(SocialPost, pk=self.kwargs['post_id'])
+        # The row and the post's like_count/comment_count (signals.py) commit together
+        with transaction.atomic():
+            serializer.save(user=self.request.user, post=post)
+
 
+class LikeListCreateView(PostEngagementMixin, generics.ListCreateAPIView):
+    """
+    GET:  /social-posts/<post_id>/like/?cursor=&limit=  -> users who liked the post
+    POST: /social-posts/<post_id>/like/                 -> like the post
+    """
+    serializer_class = LikeSerializer
+    model = Like
 
-class CommentCreateView(generics.CreateAPIView):
+
+class CommentListCreateView(PostEngagementMixin, generics.ListCreateAPIView):
+    """
+    GET:  /social-posts/<post_id>/comment/?cursor=&limit=  -> the post's comments
+    POST: /social-posts/<post_id>/comment/                 -> add a comment
+    """
     serializer_class = CommentSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    model = Comment
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+
+# -------------------------------
+# RESPONSE CACHE STATS
+# -------------------------------
+
+class ResponseCacheStatsView(APIView):
+    """
+    Hit/miss counters of the anonymous response cache, per view (staff only).
+    Endpoint: /cache/stats/
+    """
+    permission_classes = [permissions.IsAdminUser]
+    cached_views = (UserListView, ProjectListCreateView, ProjectDetailView, SocialPostListCreateView)
+
+    def get(self, request):
+        return Response(get_stats([view.__name__ for view in self.cached_views]))
+
+
+# -------------------------------
+# SEARCH
+# -------------------------------
+
+class SearchView(SocialPostFeedMixin, generics.GenericAPIView):
+    """
+    Ranked full-text search over users, posts and projects.
+    Endpoint: /search/?q=<text>&type=user|post|project&limit=20&offset=0
+    Posts are returned in the summary feed representation.
+    """
+    permission_classes = [permissions.AllowAny]
+    pagination_class = None
+    default_limit = 20
+    max_limit = 50
+    max_offset = 1000
+
+    def is_summary_mode(self):
+        return True
+
+    def _int_param(self, name, default, upper):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            value = default
+        return max(0, min(value, upper))
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type') or None
+        if kind and kind not in dict(SearchDocument.KIND_CHOICES):
+            return Response({"error": "type must be one of user, post, project."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, self._int_param('limit', self.default_limit, self.max_limit))
+        offset = self._int_param('offset', 0, self.max_offset)
+
+        hits = search(query, kind=kind, limit=limit + 1, offset=offset)
+        has_next = len(hits) > limit
+        hits = hits[:limit]
+
+        ids = {}
+        for hit_kind, object_id, _ in hits:
+            ids.setdefault(hit_kind, []).append(object_id)
+        context = self.get_serializer_context()
+        loaded = {
+            SearchDocument.KIND_USER: (
+                User.objects.select_related('userprofile').in_bulk(ids.get(SearchDocument.KIND_USER, [])),
+                PublicUserSerializer,
+            ),
+            SearchDocument.KIND_POST: (
+                self.decorate_feed_queryset(SocialPost.objects.all()).in_bulk(ids.get(SearchDocument.KIND_POST, [])),
+                SocialPostSummarySerializer,
+            ),
+            SearchDocument.KIND_PROJECT: (
+                Project.objects.select_related('owner__userprofile').in_bulk(ids.get(SearchDocument.KIND_PROJECT, [])),
+                ProjectSerializer,
+            ),
+        }
+
+        results = []
+        for hit_kind, object_id, rank in hits:
+            objects, serializer_class = loaded[hit_kind]
+            if object_id in objects:
+                results.append({
+                    "type": hit_kind,
+                    "id": object_id,
+                    "rank": rank,
+                    "object": serializer_class(objects[object_id], context=context).data,
+                })
+        return Response({
+            "next": offset + limit if has_next and offset + limit <= self.max_offset else None,
+            "results": results,
+        })
 
 
 # -------------------------------
 # CHAT / MESSAGING
 # -------------------------------
 
-class ConversationListCreateView(generics.ListCreateAPIView):
+class ConversationListCreateView(SparseFieldsetMixin, generics.ListCreateAPIView):
+    """
+    GET:  /conversations/?cursor=&limit=  -> my inbox, most recently active first,
+          each with its last message and my unread_count
+    POST: /conversations/                 -> start a conversation
+    """
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_fields = ('last_message_at', 'conversation_id')
 
     def get_queryset(self):
-        # ✅ FIX: Ensure we select related user profiles to avoid N+1 queries in the serializer
-        return Conversation.objects.filter(
-            models.Q(user1=self.request.user) | models.Q(user2=self.request.user)
-        ).select_related('user1__userprofile', 'user2__userprofile')
+        # ✅ FIX: Ensure we select related users to avoid N+1 queries in the serializer
+        return self.select_rendered_relations(Conversation.objects.filter(participants__user=self.request.user))
 
-    def perform_create(self, serializer):
-        # We assume the incoming data includes 'user2' (the other user's ID)
-        # The serializer should validate that 'user2' is present
-        # user1 is automatically set to the requesting user
-        serializer.save(user1=self.request.user)
+    def list(self, request, *args, **kwargs):
+        # The inbox is one range scan over my participant rows (participant_inbox_idx)
+        paginator = self.paginator
+        paginator.fields = self.cursor_fields
+        paginator.limit = limit = paginator.get_limit(request)
+        rows = paginator.apply_cursor(
+            ConversationParticipant.objects.filter(user=request.user),
+            request.query_params.get(paginator.cursor_query_param),
+        ).values('conversation_id', 'last_message_at', 'unread_count')[:limit + 1]
+
+        page = paginator.build_page(list(rows))
+        conversations = self.get_queryset().in_bulk([row['conversation_id'] for row in page])
+        for row in page:
+            conversations[row['conversation_id']].unread_count = row['unread_count']
+        serializer = self.get_serializer(
+            [conversations[row['conversation_id']] for row in page], many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    def create(self, request, *args, **kwargs):
+        """
+        Idempotent: returns the existing conversation with `user2` (200) or a
+        new one (201). The pair is stored in canonical order, so the caller
+        may appear as user1 or user2 in the response.
+        """
+        other_id = request.data.get('user2')
+        try:
+            other = User.objects.get(id=other_id)
+        except (User.DoesNotExist, ValueError, TypeError):
+            return Response({"error": "user2 must be an existing user id"}, status=status.HTTP_400_BAD_REQUEST)
+        if other.id == request.user.id:
+            return Response({"error": "You cannot start a conversation with yourself."},
+                            status=status.HTTP_400_BAD_REQUEST)
 
+        conversation, created = get_or_create_conversation(request.user.id, other.id)
+        conversation = self.get_queryset().get(pk=conversation.pk)
+        serializer = self.get_serializer(conversation)
+        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
-class MessageListCreateView(generics.ListCreateAPIView):
+
+class ConversationReadView(APIView):
+    """
+    Mark a conversation read up to a message (default: the newest one).
+    Endpoint: POST /conversations/<id>/read/  {"message_id": <optional id>}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, conversation_id):
+        participant = get_object_or_404(
+            ConversationParticipant, conversation_id=conversation_id, user=request.user
+        )
+        try:
+            message_id = _optional_int(request.data.get('message_id'))
+        except (TypeError, ValueError):
+            return Response({"error": "message_id must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        participant = mark_read(participant, message_id)
+        return Response({
+            "conversation": participant.conversation_id,
+            "last_read_message_id": participant.last_read_message_id,
+            "unread_count": participant.unread_count,
+        })
+
+
+def _optional_int(value):
+    return int(value) if value not in (None, '') else None
+
+
+class MessageListCreateView(AsyncListMixin, SparseFieldsetMixin, generics.ListCreateAPIView):
+    """
+    GET:  /conversations/<id>/messages/?limit=          -> the latest messages, oldest first
+          ?after_id=<id>                               -> only messages newer than <id> (incremental sync)
+          ?after_id=<id>&wait=<seconds>                -> long-poll: hold until one arrives or <seconds> pass
+                                                          (capped at MESSAGE_LONG_POLL_SYNC_MAX_WAIT off the async path)
+          ?before_id=<id>                              -> the page of older messages just before <id>
+    POST: /conversations/<id>/messages/                -> send a message
+
+    Every read is a single range scan on (conversation_id, id), so a poll
+    costs the size of the answer rather than the size of the history.
+    """
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def is_participant(self):
+        """Whether the current user takes part in the conversation (cached per request)."""
+        if not hasattr(self, '_is_participant'):
+            self._is_participant = is_participant(self.request.user.id, self.kwargs["conversation_id"])
+        return self._is_participant
+
     def get_queryset(self):
-        conversation_id = self.kwargs["conversation_id"]
-        # ✅ FIX: Ensure we select related sender profile to avoid N+1 queries in the serializer
-        # Also, filter by conversation AND ensure the user is part of that conversation for security
-        
-        user = self.request.user
-        
         # Security Check: Ensure the user is part of the conversation
-        conversation = Conversation.objects.filter(
-            id=conversation_id
-        ).filter(
-            models.Q(user1=user) | models.Q(user2=user)
-        ).first()
-
-        if not conversation:
-            # Return empty queryset or raise exception if conversation is not found or user is not a participant
+        if not self.is_participant():
             return Message.objects.none()
-            
-        return Message.objects.filter(
-            conversation_id=conversation_id
-        ).select_related('sender__userprofile').order_by("timestamp")
+        # Ordering is applied per read mode in list()
+        return self.select_rendered_relations(Message.objects.filter(conversation_id=self.kwargs["conversation_id"]))
+
+    def get_read_params(self, request):
+        """(after_id, before_id, limit, wait) from the query string; raises ValueError."""
+        after_id = _optional_int(request.query_params.get('after_id'))
+        before_id = _optional_int(request.query_params.get('before_id'))
+        limit = _optional_int(request.query_params.get('limit')) or settings.MESSAGE_PAGE_SIZE
+        wait = float(request.query_params.get('wait') or 0)
+        return after_id, before_id, max(1, min(limit, settings.MESSAGE_PAGE_MAX)), wait
+
+    def read_page(self, after_id, before_id, limit):
+        """The messages for one read, oldest first, without waiting."""
+        queryset = self.get_queryset()
+        # Archived ids are all lower than hot ids (projects/archive.py), so a
+        # page continues into the archive exactly where the hot rows run out.
+        archived = archived_messages(self.kwargs["conversation_id"]) if self.is_participant() else None
+
+        if after_id is not None:
+            page = list(archived.filter(id__gt=after_id).order_by('id')[:limit]) if archived is not None else []
+            if len(page) < limit:
+                page += list(queryset.filter(id__gt=after_id).order_by('id')[:limit - len(page)])
+            return page
+
+        if before_id is not None:
+            queryset = queryset.filter(id__lt=before_id)
+        page = list(queryset.order_by('-id')[:limit])
+        if len(page) < limit and archived is not None:
+            cursor = page[-1].id if page else before_id
+            if cursor is not None:
+                archived = archived.filter(id__lt=cursor)
+            page += list(archived.order_by('-id')[:limit - len(page)])
+        page.reverse()
+        return page
+
+    def should_wait(self, page, after_id, wait):
+        return not page and after_id is not None and wait > 0 and self.is_participant()
 
+    def list(self, request, *args, **kwargs):
+        try:
+            after_id, before_id, limit, wait = self.get_read_params(request)
+        except ValueError:
+            return Response({"error": "after_id, before_id, limit and wait must be numbers"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        page = self.read_page(after_id, before_id, limit)
+        if self.should_wait(page, after_id, wait):
+            # A sync long-poll holds a worker thread for its whole wait, so it is
+            # capped hard here; the async path (ASYNC_READ_VIEWS) can wait longer.
+            self._wait_for_messages(after_id, min(wait, settings.MESSAGE_LONG_POLL_SYNC_MAX_WAIT))
+            page = self.read_page(after_id, before_id, limit)
+
+        serializer = self.get_serializer(page, many=True)
+        return Response(serializer.data)
+
+    async def alist(self, request, *args, **kwargs):
+        """list() for the async path (projects/async_views.py); a long-poll just awaits."""
+        try:
+            after_id, before_id, limit, wait = self.get_read_params(request)
+        except ValueError:
+            return Response({"error": "after_id, before_id, limit and wait must be numbers"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        page = await sync_to_async(self.read_page)(after_id, before_id, limit)
+        if await sync_to_async(self.should_wait)(page, after_id, wait):
+            await self._await_messages(after_id, min(wait, settings.MESSAGE_LONG_POLL_MAX_WAIT))
+            page = await sync_to_async(self.read_page)(after_id, before_id, limit)
+
+        # Messages and their senders are already loaded, so this serializes without queries
+        return Response(self.get_serializer(page, many=True).data)
+
+    def _wait_for_messages(self, after_id, timeout):
+        # Re-check with a cheap EXISTS on the index until something arrives
+        newer = self.get_queryset().filter(id__gt=after_id)
+        deadline = time.monotonic() + timeout
+        while not newer.exists():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(settings.MESSAGE_LONG_POLL_INTERVAL, remaining))
+
+    async def _await_messages(self, after_id, timeout):
+        newer = self.get_queryset().filter(id__gt=after_id)
+        deadline = time.monotonic() + timeout
+        while not await newer.aexists():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(settings.MESSAGE_LONG_POLL_INTERVAL, remaining))
 
     def perform_create(self, serializer):
         conversation_id = self.kwargs["conversation_id"]
+        if not self.is_participant():
+            raise PermissionDenied("You are not part of this conversation.")
         # This view's perform_create is robust: it injects sender and conversation_id
-        serializer.save(sender=self.request.user, conversation_id=conversation_id)
\ No newline at end of file
+        serializer.save(sender=self.request.user, conversation_id=conversation_id)
+        # Push to live subscribers (projects/realtime.py) once the row is committed
+        publish_message(serializer.instance)
\ No newline at end of file
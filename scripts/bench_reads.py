@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Throughput and tail latency of the read endpoints behind ASYNC_READ_VIEWS.
+
+Keeps --concurrency requests in flight against each path for --duration
+seconds and prints requests/second plus p50/p99 latency. Run the same
+command against each server with the same number of worker processes:
+
+    # 1. WSGI, sync views
+    gunicorn doomscrollr.wsgi:application -w 4 --threads 8 -b 127.0.0.1:8000
+    # 2. ASGI, sync views
+    gunicorn doomscrollr.asgi:application -k uvicorn.workers.UvicornWorker -w 4 -b 127.0.0.1:8000
+    # 3. ASGI, async views
+    ASYNC_READ_VIEWS=True gunicorn doomscrollr.asgi:application -k uvicorn.workers.UvicornWorker -w 4 -b 127.0.0.1:8000
+
+    python scripts/bench_reads.py --base-url http://127.0.0.1:8000 --token "$ACCESS_TOKEN" \\
+        --path /api/social-posts/ --path /api/users/ --path "/api/conversations/1/messages/?limit=50"
+
+Responses to anonymous requests can come from the response cache, so pass
+--token to measure the views themselves. Point DATABASE_URL at the same
+Postgres database in every run; SQLite serializes writers and hides the
+difference.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = ['/api/social-posts/', '/api/users/', '/api/projects/']
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def bench(client, url, concurrency, duration, warmup):
+    latencies, errors = [], 0
+    record = False
+
+    async def worker(deadline):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if not record:
+                continue
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(worker(time.perf_counter() + warmup) for _ in range(concurrency)))
+    record = True
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(started + duration) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, latencies, errors
+
+
+async def main(args):
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits,
+                                 timeout=args.timeout) as client:
+        print(f'{"path":<50} {"rps":>9} {"p50 ms":>9} {"p99 ms":>9} {"errors":>7}')
+        for path in args.path or DEFAULT_PATHS:
+            rps, latencies, errors = await bench(client, path, args.concurrency, args.duration, args.warmup)
+            if latencies:
+                print(f'{path:<50} {rps:>9.1f} {statistics.median(latencies):>9.1f} '
+                      f'{percentile(latencies, 99):>9.1f} {errors:>7}')
+            else:
+                print(f'{path:<50} {"-":>9} {"-":>9} {"-":>9} {errors:>7}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--token', default=os.getenv('ACCESS_TOKEN'), help='JWT access token (or $ACCESS_TOKEN)')
+    parser.add_argument('--path', action='append', help=f'repeatable; default {" ".join(DEFAULT_PATHS)}')
+    parser.add_argument('--concurrency', type=int, default=64, help='requests in flight')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds per path')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds per path')
+    parser.add_argument('--timeout', type=float, default=30)
+    asyncio.run(main(parser.parse_args()))
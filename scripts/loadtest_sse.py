@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Load test for live chat delivery (GET /api/conversations/<id>/events/).
+
+Opens --connections Server-Sent Events streams on one conversation, waits
+until every stream is established, then posts --messages messages through
+the REST API and measures how long each one takes to reach every stream.
+
+    ulimit -n 65536
+    gunicorn doomscrollr.asgi:application -k uvicorn.workers.UvicornWorker -w 1 &
+    python scripts/loadtest_sse.py --base-url http://127.0.0.1:8000 \
+        --token "$ACCESS_TOKEN" --conversation 1 --connections 2000
+
+The token must belong to a participant of the conversation. Run it with one
+worker and InProcessBroker, then with several workers and
+DatabasePollingBroker (CHAT_BROKER), and watch the server's memory and
+database connections while the streams sit idle.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+
+class Listener:
+    def __init__(self):
+        self.connected = asyncio.Event()
+        self.arrivals = {}  # message id -> perf_counter when it arrived
+        self.error = None
+
+
+async def listen(client, url, token, listener):
+    try:
+        async with client.stream('GET', url, params={'access_token': token},
+                                 headers={'Accept': 'text/event-stream'}) as response:
+            if response.status_code != 200:
+                listener.error = f'HTTP {response.status_code}'
+                return
+            async for line in response.aiter_lines():
+                # The stream opens with "retry: ..."; after that every event has an id
+                listener.connected.set()
+                if line.startswith('id: '):
+                    listener.arrivals[int(line[4:])] = time.perf_counter()
+    except (httpx.HTTPError, OSError) as exc:
+        listener.error = type(exc).__name__
+    finally:
+        listener.connected.set()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def main(args):
+    events_url = f'{args.base_url}/api/conversations/{args.conversation}/events/'
+    messages_url = f'{args.base_url}/api/conversations/{args.conversation}/messages/'
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(args.timeout, read=None)
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as streams, \
+            httpx.AsyncClient(timeout=args.timeout) as api:
+        listeners = [Listener() for _ in range(args.connections)]
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(listen(streams, events_url, args.token, listener)) for listener in listeners]
+        await asyncio.gather(*(listener.connected.wait() for listener in listeners))
+        failed = [listener.error for listener in listeners if listener.error]
+        print(f'{len(listeners) - len(failed)}/{len(listeners)} streams open in '
+              f'{time.perf_counter() - started:.1f}s' + (f' ({len(failed)} failed, e.g. {failed[0]})' if failed else ''))
+
+        sent = {}
+        for i in range(args.messages):
+            sent_at = time.perf_counter()
+            response = await api.post(messages_url, json={'text': f'load test {i}'},
+                                      headers={'Authorization': f'Bearer {args.token}'})
+            response.raise_for_status()
+            sent[response.json()['id']] = sent_at
+            await asyncio.sleep(args.interval)
+        await asyncio.sleep(args.drain)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    live = [listener for listener in listeners if not listener.error]
+    latencies = [
+        (listener.arrivals[message_id] - sent_at) * 1000
+        for listener in live
+        for message_id, sent_at in sent.items()
+        if message_id in listener.arrivals
+    ]
+    expected = len(live) * len(sent)
+    print(f'delivered {len(latencies)}/{expected} messages '
+          f'({100 * len(latencies) / expected if expected else 0:.1f}%)')
+    if latencies:
+        print(f'latency ms: p50={statistics.median(latencies):.1f} p95={percentile(latencies, 95):.1f} '
+              f'p99={percentile(latencies, 99):.1f} max={max(latencies):.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--token', default=os.getenv('ACCESS_TOKEN'), help='JWT access token (or $ACCESS_TOKEN)')
+    parser.add_argument('--conversation', type=int, required=True)
+    parser.add_argument('--connections', type=int, default=500)
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.5, help='seconds between messages')
+    parser.add_argument('--drain', type=float, default=5, help='seconds to wait for the last deliveries')
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+    if not args.token:
+        parser.error('--token or $ACCESS_TOKEN is required')
+    asyncio.run(main(args))